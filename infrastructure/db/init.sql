@@ -126,3 +126,69 @@ CREATE INDEX idx_document_assignments_user_id ON document_assignments(user_id);
 CREATE INDEX idx_document_assignments_status ON document_assignments(status);
 CREATE INDEX idx_audit_logs_entity_type ON audit_logs(entity_type);
 CREATE INDEX idx_audit_logs_created_at ON audit_logs(created_at);
+
+-- Composite and search indexes for analytics filters
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX idx_documents_status_created ON documents(status, created_at);
+CREATE INDEX idx_documents_confidence ON documents(confidence);
+CREATE INDEX idx_assignments_user_status ON document_assignments(user_id, status);
+CREATE INDEX idx_doc_name_trgm ON documents USING gin (original_name gin_trgm_ops);
+
+-- Full-text search vector over document name + summary, kept fresh by triggers
+ALTER TABLE documents ADD COLUMN search_vec TSVECTOR;
+CREATE INDEX idx_doc_search ON documents USING gin (search_vec);
+
+CREATE OR REPLACE FUNCTION refresh_document_search_vec() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vec := to_tsvector('english', NEW.original_name);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_documents_search_vec
+    BEFORE INSERT OR UPDATE OF original_name ON documents
+    FOR EACH ROW EXECUTE FUNCTION refresh_document_search_vec();
+
+CREATE OR REPLACE FUNCTION refresh_metadata_search_vec() RETURNS trigger AS $$
+BEGIN
+    UPDATE documents
+    SET search_vec = to_tsvector('english', original_name || ' ' || coalesce(NEW.summary, ''))
+    WHERE id = NEW.doc_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_metadata_search_vec
+    AFTER INSERT OR UPDATE OF summary ON metadata
+    FOR EACH ROW EXECUTE FUNCTION refresh_metadata_search_vec();
+CREATE INDEX idx_documents_created_id ON documents(created_at, id);
+
+-- Expression indexes matching the date_trunc('day', ...) trend group keys
+CREATE INDEX idx_doc_created_day ON documents ((date_trunc('day', created_at)));
+CREATE INDEX idx_doc_created_day_completed ON documents ((date_trunc('day', created_at)))
+    WHERE status = 'completed';
+
+-- User listing filters and the workload lookups; the partial index covers
+-- only active assignments, which is all the workload queries touch
+CREATE INDEX idx_user_role_dept ON users(role, department);
+CREATE INDEX idx_assignments_active ON document_assignments(user_id, priority)
+    WHERE status IN ('assigned', 'in_progress');
+
+-- Metadata is one row per document; the unique constraint backs the
+-- classification worker's ON CONFLICT upsert and replaces the plain index
+ALTER TABLE metadata ADD CONSTRAINT uq_metadata_doc_id UNIQUE (doc_id);
+DROP INDEX IF EXISTS idx_metadata_doc_id;
+
+-- Recrawls of unchanged pages hit this unique index and are dropped by the
+-- scraper's ON CONFLICT DO NOTHING insert
+CREATE UNIQUE INDEX ux_scraped_content_hash ON scraped_content(source_id, content_hash);
+
+-- Full-text search over scraped pages; generated column so the vector
+-- maintains itself, GIN index so ILIKE-style scans become index lookups
+ALTER TABLE scraped_content ADD COLUMN search_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))) STORED;
+CREATE INDEX ix_scraped_search ON scraped_content USING GIN (search_tsv);
+
+-- Covers the routing statistics aggregate: the filtered status counts and
+-- the completion-time average read only these three columns
+CREATE INDEX ix_assignments_status_times ON document_assignments(status, completed_at, created_at);
@@ -1,6 +1,6 @@
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Text, ARRAY, JSON, ForeignKey, BigInteger
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Text, ARRAY, JSON, ForeignKey, BigInteger, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -10,7 +10,15 @@ Base = declarative_base()
 
 class Document(Base):
     __tablename__ = "documents"
-    
+    __table_args__ = (
+        Index("ix_documents_status_created", "status", "created_at"),
+        Index("ix_documents_doc_type", "doc_type"),
+        Index("ix_documents_created_at", "created_at"),
+        Index("ix_documents_created_id", "created_at", "id"),
+        Index("ix_documents_confidence", "confidence"),
+        Index("ix_doc_search", "search_vec", postgresql_using="gin"),
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     original_name = Column(String(255), nullable=False)
     storage_path = Column(Text, nullable=False)
@@ -20,18 +28,21 @@ class Document(Base):
     mime_type = Column(String(100))
     content_hash = Column(String(64))
     status = Column(String(20), default='pending')
+    search_vec = Column(TSVECTOR)  # maintained by triggers in init.sql
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
-    # Relationships
-    metadata = relationship("Metadata", back_populates="document", cascade="all, delete-orphan")
+    # Relationships ("metadata" is reserved on declarative classes, so the
+    # relationship is exposed as "meta")
+    meta = relationship("Metadata", back_populates="document", cascade="all, delete-orphan")
     assignments = relationship("DocumentAssignment", back_populates="document", cascade="all, delete-orphan")
 
 class Metadata(Base):
     __tablename__ = "metadata"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    doc_id = Column(UUID(as_uuid=True), ForeignKey('documents.id', ondelete='CASCADE'))
+    # One metadata row per document; unique so the worker can upsert
+    doc_id = Column(UUID(as_uuid=True), ForeignKey('documents.id', ondelete='CASCADE'), unique=True)
     key_entities = Column(JSONB)
     related_docs = Column(ARRAY(UUID))
     risk_score = Column(Float)
@@ -42,11 +53,15 @@ class Metadata(Base):
     created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
-    document = relationship("Document", back_populates="metadata")
+    document = relationship("Document", back_populates="meta")
 
 class User(Base):
     __tablename__ = "users"
-    
+    __table_args__ = (
+        Index("ix_user_role_dept", "role", "department"),
+    )
+
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     username = Column(String(100), unique=True, nullable=False)
     email = Column(String(255), unique=True, nullable=False)
@@ -76,7 +91,12 @@ class RoutingRule(Base):
 
 class DocumentAssignment(Base):
     __tablename__ = "document_assignments"
-    
+    __table_args__ = (
+        Index("ix_assignments_user_status", "user_id", "status"),
+        # Covers the statistics aggregate (counts + completion-time average)
+        Index("ix_assignments_status_times", "status", "completed_at", "created_at"),
+    )
+
     id = Column(Integer, primary_key=True, autoincrement=True)
     doc_id = Column(UUID(as_uuid=True), ForeignKey('documents.id', ondelete='CASCADE'))
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'))
@@ -119,14 +139,23 @@ class ScrapingSource(Base):
 
 class ScrapedContent(Base):
     __tablename__ = "scraped_content"
-    
+    __table_args__ = (
+        # Unchanged recrawls upsert into this and get dropped
+        Index("ux_scraped_content_hash", "source_id", "content_hash", unique=True),
+        Index("ix_scraped_search", "search_tsv", postgresql_using="gin"),
+    )
+
+
     id = Column(Integer, primary_key=True, autoincrement=True)
     source_id = Column(Integer, ForeignKey('scraping_sources.id'))
     url = Column(Text, nullable=False)
     title = Column(String(500))
     content = Column(Text)
     content_hash = Column(String(64))
-    metadata = Column(JSONB)
+    # Maps the "metadata" column under a non-reserved attribute name
+    meta = Column('metadata', JSONB)
+    # Generated in Postgres from title + content (see infrastructure/db/init.sql)
+    search_tsv = Column(TSVECTOR)
     scraped_at = Column(DateTime, server_default=func.now())
     
     # Relationships
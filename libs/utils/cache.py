@@ -0,0 +1,47 @@
+
+import redis
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+
+# Shared best-effort cache client; callers treat Redis as optional and fall
+# back to doing the work when it is unavailable
+redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+
+def cache_get(key: str):
+    """Get a cached value, or None if missing or Redis is down"""
+    try:
+        return redis_client.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Redis get failed for {key}: {e}")
+        return None
+
+def cache_setex(key: str, ttl_seconds: int, value: str):
+    """Set a cached value with a TTL, ignoring Redis failures"""
+    try:
+        redis_client.setex(key, ttl_seconds, value)
+    except redis.RedisError as e:
+        logger.warning(f"Redis setex failed for {key}: {e}")
+
+def cache_set_nx(key: str, ttl_seconds: int, value: str) -> bool:
+    """Set a value only if the key is absent; True if this call set it.
+
+    Returns True (treat as first sighting) when Redis is down, so callers
+    never skip work because the cache is unreachable.
+    """
+    try:
+        return bool(redis_client.set(key, value, nx=True, ex=ttl_seconds))
+    except redis.RedisError as e:
+        logger.warning(f"Redis set-nx failed for {key}: {e}")
+        return True
+
+def cache_delete(key: str):
+    """Drop a cached value, ignoring Redis failures"""
+    try:
+        redis_client.delete(key)
+    except redis.RedisError as e:
+        logger.warning(f"Redis delete failed for {key}: {e}")
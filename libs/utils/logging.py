@@ -0,0 +1,31 @@
+
+import logging
+import logging.handlers
+import queue
+
+_listener = None
+
+def setup_queue_logging(level=logging.INFO):
+    """Route all log records through an in-memory queue
+
+    Worker threads only enqueue records; a single background thread formats
+    them and writes to stdout, so the hot paths never block on the write()
+    syscall. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.handlers.clear()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
@@ -1,13 +1,26 @@
 
 import pika
-import json
+import pika.exceptions
+import orjson
 import os
+import collections
+import threading
+import time
 from typing import Dict, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Messages are always persistent; build the properties object once instead of
+# allocating it per publish
+_PERSISTENT_PROPS = pika.BasicProperties(delivery_mode=2)
+
 class MessageQueue:
+    # Publishes are buffered and written back-to-back so the per-message
+    # connection checks and socket round-trips are amortized across a batch
+    BATCH_SIZE = 64
+    FLUSH_INTERVAL = 0.05  # seconds
+
     def __init__(self):
         self.host = os.getenv("RABBITMQ_HOST", "localhost")
         self.port = int(os.getenv("RABBITMQ_PORT", "5672"))
@@ -15,17 +28,25 @@ class MessageQueue:
         self.password = os.getenv("RABBITMQ_PASSWORD", "secret")
         self.connection = None
         self.channel = None
-        
+        self._parameters = pika.ConnectionParameters(
+            host=self.host,
+            port=self.port,
+            credentials=pika.PlainCredentials(self.username, self.password)
+        )
+        self._pending = collections.deque()
+        self._last_flush = time.monotonic()
+        # Armed whenever messages are buffered without an immediate flush,
+        # so a lone message still reaches the broker within FLUSH_INTERVAL
+        # even if no further publish ever arrives
+        self._flush_timer = None
+        # Serializes access to the single shared channel; publishers run on
+        # several worker threads but multiplex one connection
+        self._publish_lock = threading.RLock()
+
     def connect(self):
         """Establish connection to RabbitMQ"""
         try:
-            credentials = pika.PlainCredentials(self.username, self.password)
-            parameters = pika.ConnectionParameters(
-                host=self.host,
-                port=self.port,
-                credentials=credentials
-            )
-            self.connection = pika.BlockingConnection(parameters)
+            self.connection = pika.BlockingConnection(self._parameters)
             self.channel = self.connection.channel()
             
             # Declare queues
@@ -41,21 +62,80 @@ class MessageQueue:
             raise
     
     def publish_message(self, queue: str, message: Dict[Any, Any]):
-        """Publish a message to a queue"""
+        """Buffer a message for publishing, flushing in batches
+
+        Messages that don't trigger an immediate flush are covered by a
+        one-shot timer, so the tail of a burst is never stranded in the
+        buffer waiting for a publish that may not come.
+        """
+        with self._publish_lock:
+            self._pending.append((queue, orjson.dumps(message)))
+            if (len(self._pending) >= self.BATCH_SIZE
+                    or time.monotonic() - self._last_flush > self.FLUSH_INTERVAL):
+                self._flush_locked()
+            elif self._flush_timer is None:
+                self._arm_timer_locked()
+
+    def flush(self):
+        """Write all buffered messages to the broker in one burst"""
+        with self._publish_lock:
+            self._flush_locked()
+
+    def _arm_timer_locked(self):
+        timer = threading.Timer(self.FLUSH_INTERVAL, self._timer_flush)
+        timer.daemon = True
+        timer.start()
+        self._flush_timer = timer
+
+    def _timer_flush(self):
+        """Drain the buffer from the flush timer thread"""
+        with self._publish_lock:
+            self._flush_timer = None
+            try:
+                self._flush_locked()
+            except Exception:
+                # Already logged; keep the messages buffered and re-arm so
+                # a broker blip doesn't strand them until the next publish
+                if self._pending:
+                    self._arm_timer_locked()
+
+    def _flush_locked(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._pending:
+            self._last_flush = time.monotonic()
+            return
         try:
             if not self.connection or self.connection.is_closed:
                 self.connect()
-                
-            self.channel.basic_publish(
-                exchange='',
-                routing_key=queue,
-                body=json.dumps(message),
-                properties=pika.BasicProperties(delivery_mode=2)  # Make message persistent
-            )
-            logger.info(f"Published message to queue {queue}")
+
+            while self._pending:
+                queue, body = self._pending[0]
+                try:
+                    self.channel.basic_publish(
+                        exchange='',
+                        routing_key=queue,
+                        body=body,
+                        properties=_PERSISTENT_PROPS
+                    )
+                except (pika.exceptions.AMQPConnectionError,
+                        pika.exceptions.ChannelWrongStateError):
+                    # Stale channel: reconnect once and retry this message
+                    self.connect()
+                    self.channel.basic_publish(
+                        exchange='',
+                        routing_key=queue,
+                        body=body,
+                        properties=_PERSISTENT_PROPS
+                    )
+                self._pending.popleft()
+            logger.info("Flushed message batch to broker")
         except Exception as e:
-            logger.error(f"Failed to publish message: {e}")
+            logger.error(f"Failed to publish message batch: {e}")
             raise
+        finally:
+            self._last_flush = time.monotonic()
     
     def consume_messages(self, queue: str, callback):
         """Consume messages from a queue"""
@@ -77,6 +157,7 @@ class MessageQueue:
     def close(self):
         """Close connection"""
         if self.connection and not self.connection.is_closed:
+            self.flush()
             self.connection.close()
 
 # Global message queue instance
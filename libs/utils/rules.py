@@ -0,0 +1,117 @@
+
+from dataclasses import dataclass, fields, replace
+from operator import attrgetter
+from typing import Any, Callable, Dict
+
+@dataclass(frozen=True, slots=True)
+class RoutingContext:
+    """Evaluation context for routing-rule predicates.
+
+    A slotted dataclass instead of a dict: predicates bind attrgetters at
+    compile time, so per-field access on the hot path is a slot read rather
+    than a string hash and dict probe, and instances carry no per-object
+    __dict__.
+    """
+    doc_type: str
+    confidence: float
+    entities: Dict[str, Any]
+    risk_score: float
+    priority: int
+    persons: tuple
+    organizations: tuple
+    amounts: tuple
+    dates: tuple
+
+_CONTEXT_FIELDS = frozenset(f.name for f in fields(RoutingContext))
+
+def lower_context(context: RoutingContext) -> RoutingContext:
+    """Lower-case a context's string fields (and string tuple items) once.
+
+    Compiled predicates expect contexts prepared with this helper, so the
+    per-rule, per-field .lower() calls collapse into one pass per document.
+    """
+    changes = {}
+    for field in fields(context):
+        value = getattr(context, field.name)
+        if isinstance(value, str):
+            changes[field.name] = value.lower()
+        elif isinstance(value, tuple):
+            changes[field.name] = tuple(
+                item.lower() if isinstance(item, str) else item for item in value
+            )
+    return replace(context, **changes) if changes else context
+
+def _string_check(key: str, needle: str):
+    """Case-insensitive substring match against a string or tuple value"""
+    getter = attrgetter(key)
+    def check(context: RoutingContext) -> bool:
+        value = getter(context)
+        if isinstance(value, str):
+            return needle in value
+        if isinstance(value, tuple):
+            return any(isinstance(item, str) and needle in item for item in value)
+        return False
+    return check
+
+def _numeric_check(key: str, expected):
+    """Exact numeric equality"""
+    getter = attrgetter(key)
+    def check(context: RoutingContext) -> bool:
+        value = getter(context)
+        return isinstance(value, (int, float)) and value == expected
+    return check
+
+def _comparison_check(key: str, spec: Dict[str, Any]):
+    """Advanced conditions (gt/lt/gte/lte/contains), bounds resolved up front"""
+    getter = attrgetter(key)
+    ops = []
+    if "gt" in spec:
+        ops.append(lambda v, b=spec["gt"]: isinstance(v, (int, float)) and v > b)
+    if "lt" in spec:
+        ops.append(lambda v, b=spec["lt"]: isinstance(v, (int, float)) and v < b)
+    if "gte" in spec:
+        ops.append(lambda v, b=spec["gte"]: isinstance(v, (int, float)) and v >= b)
+    if "lte" in spec:
+        ops.append(lambda v, b=spec["lte"]: isinstance(v, (int, float)) and v <= b)
+    needle = spec["contains"].lower() if isinstance(spec.get("contains"), str) else None
+
+    def check(context: RoutingContext) -> bool:
+        value = getter(context)
+        for op in ops:
+            if not op(value):
+                return False
+        if needle is not None:
+            if isinstance(value, str):
+                return needle in value
+            if isinstance(value, tuple):
+                return any(isinstance(item, str) and needle in item for item in value)
+        return True
+    return check
+
+def compile_rule(condition: Dict[str, Any]) -> Callable[[RoutingContext], bool]:
+    """Compile a JSONB routing-rule condition into a predicate closure.
+
+    The condition dict is walked once here, at rule insert/load time, so the
+    per-document evaluation is just a chain of specialized closures instead
+    of re-interpreting the JSON structure for every routing decision.
+    Needles are pre-lowered; pass contexts through lower_context() so both
+    sides of every string comparison are lowered exactly once. Condition
+    keys that name no context field are dropped at compile time (they were
+    previously vacuously true on every document).
+    """
+    checks = []
+    for key, expected in condition.items():
+        if key not in _CONTEXT_FIELDS:
+            continue
+        if isinstance(expected, str):
+            checks.append(_string_check(key, expected.lower()))
+        elif isinstance(expected, bool):
+            checks.append(_numeric_check(key, expected))
+        elif isinstance(expected, (int, float)):
+            checks.append(_numeric_check(key, expected))
+        elif isinstance(expected, dict):
+            checks.append(_comparison_check(key, expected))
+
+    def evaluate(context: RoutingContext) -> bool:
+        return all(check(context) for check in checks)
+    return evaluate
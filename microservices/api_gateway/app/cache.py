@@ -0,0 +1,20 @@
+
+import hashlib
+from fastapi_cache import FastAPICache
+
+
+def deterministic_key_builder(func, namespace="", *, request=None, response=None,
+                              args=(), kwargs=None):
+    """Cache key builder that ignores injected dependencies
+
+    The library default hashes repr(kwargs), and the Depends-injected
+    AsyncSession repr includes its memory address — a fresh one per
+    request — so every request produced a unique key and the cache never
+    hit. Dropping `db` leaves only the deterministic route parameters in
+    the key.
+    """
+    kwargs = {k: v for k, v in (kwargs or {}).items() if k != "db"}
+    prefix = f"{FastAPICache.get_prefix()}:{namespace}:"
+    return prefix + hashlib.md5(
+        f"{func.__module__}:{func.__name__}:{args}:{kwargs}".encode()
+    ).hexdigest()
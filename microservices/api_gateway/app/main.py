@@ -1,15 +1,21 @@
 
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
 import uvicorn
+import asyncio
+import hashlib
 import os
-import shutil
 from typing import List, Optional
 import uuid
 
-from libs.database.connection import get_db, create_tables
+from libs.database.connection import get_async_db, create_tables
 from libs.database.models import Document, User, RoutingRule, DocumentAssignment
 from libs.utils.auth import verify_token, create_access_token
 from libs.utils.messaging import mq
@@ -19,7 +25,8 @@ from .schemas import DocumentUpload, DocumentResponse, UserCreate, UserResponse
 app = FastAPI(
     title="Document Classifier and Router API",
     description="AI-powered document intelligence system",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -33,6 +40,14 @@ app.add_middleware(
 
 security = HTTPBearer()
 
+# Registered after CORS so it sits outermost: liveness probes get answered
+# before the middleware stack, routing or any dependency runs
+@app.middleware("http")
+async def health_shortcut(request, call_next):
+    if request.url.path == "/health":
+        return PlainTextResponse("ok")
+    return await call_next(request)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
 app.include_router(documents.router, prefix="/documents", tags=["documents"])
@@ -40,28 +55,69 @@ app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(routing.router, prefix="/routing", tags=["routing"])
 app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
 
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+async def _background_init():
+    """Run blocking DDL and broker connection off the startup critical path"""
+    await asyncio.to_thread(create_tables)
+
+    delay = 1.0
+    for _ in range(6):
+        try:
+            await asyncio.to_thread(mq.connect)
+            return
+        except Exception as e:
+            print(f"Warning: Could not connect to RabbitMQ (retrying in {delay:.0f}s): {e}")
+            await asyncio.sleep(delay)
+            delay *= 2
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database and connections on startup"""
-    create_tables()
-    try:
-        mq.connect()
-    except Exception as e:
-        print(f"Warning: Could not connect to RabbitMQ: {e}")
+    FastAPICache.init(RedisBackend(aioredis.from_url(REDIS_URL)), prefix="api-cache")
+    # Workers start accepting traffic immediately; DDL and the RabbitMQ
+    # connection (with exponential backoff for cold brokers) finish behind us
+    asyncio.create_task(_background_init())
 
 @app.get("/")
 async def root():
     return {"message": "Document Classifier and Router API", "version": "1.0.0"}
 
-@app.get("/health")
+@app.get("/health", include_in_schema=False, response_class=PlainTextResponse)
 async def health_check():
-    return {"status": "healthy", "service": "api_gateway"}
+    return "ok"
+
+def _write_upload(src, path: str, size_hint: int = 0):
+    """Blocking chunked copy with preallocation; returns (size, sha256 hex).
+
+    Runs on the thread pool: 4 MiB chunks keep the syscall count low and
+    posix_fallocate reserves contiguous space up front for large files,
+    while the content hash is folded into the same pass over the data.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if size_hint > 0:
+            try:
+                os.posix_fallocate(fd, 0, size_hint)
+            except OSError:
+                pass
+        while chunk := src.read(1 << 22):
+            digest.update(chunk)
+            size += len(chunk)
+            os.write(fd, chunk)
+        os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+    return size, digest.hexdigest()
 
 @app.post("/upload", response_model=DocumentResponse)
 async def upload_document(
+    request: Request,
     file: UploadFile = File(...),
     doc_type: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """Upload a document for classification and routing"""
@@ -77,44 +133,49 @@ async def upload_document(
     storage_filename = f"{file_id}.{file_extension}" if file_extension else file_id
     file_path = f"uploads/{storage_filename}"
     
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Create document record
-    document = Document(
-        original_name=file.filename,
-        storage_path=file_path,
-        doc_type=doc_type,
-        file_size=os.path.getsize(file_path),
-        mime_type=file.content_type,
-        status='uploaded'
+    # Write the upload on the thread pool so the event loop stays free; the
+    # request Content-Length (whole multipart body) over-reserves slightly
+    # and the trailing ftruncate trims to the real size
+    size_hint = int(request.headers.get("content-length", 0))
+    file_size, file_digest = await asyncio.to_thread(
+        _write_upload, file.file, file_path, size_hint
     )
-    
-    db.add(document)
-    db.commit()
-    db.refresh(document)
-    
+
+    # Create document record; RETURNING gives us the generated id and
+    # timestamp in the same round trip instead of INSERT + refresh SELECT
+    doc_id, created_at = (await db.execute(
+        insert(Document).values(
+            original_name=file.filename,
+            storage_path=file_path,
+            doc_type=doc_type,
+            file_size=file_size,
+            mime_type=file.content_type,
+            content_hash=file_digest,
+            status='uploaded'
+        ).returning(Document.id, Document.created_at)
+    )).one()
+    await db.commit()
+
     # Send message for processing
     message = {
-        "document_id": str(document.id),
+        "document_id": str(doc_id),
         "file_path": file_path,
         "original_name": file.filename,
         "mime_type": file.content_type,
         "uploaded_by": username
     }
-    
+
     try:
         mq.publish_message("document_processing", message)
     except Exception as e:
         print(f"Warning: Could not send message to queue: {e}")
-    
+
     return DocumentResponse(
-        id=document.id,
-        original_name=document.original_name,
-        doc_type=document.doc_type,
-        status=document.status,
-        created_at=document.created_at
+        id=doc_id,
+        original_name=file.filename,
+        doc_type=doc_type,
+        status='uploaded',
+        created_at=created_at
     )
 
 if __name__ == "__main__":
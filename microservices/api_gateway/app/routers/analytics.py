@@ -1,49 +1,89 @@
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, case, bindparam
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
-from libs.database.connection import get_db
+from fastapi_cache.decorator import cache
+from libs.database.connection import get_async_db
+from ..cache import deterministic_key_builder
 from libs.database.models import Document, DocumentAssignment, User, Metadata
 from ..schemas import AnalyticsResponse
 
 router = APIRouter()
 
+# Trend statements are built once at import so SQLAlchemy compiles them a
+# single time and asyncpg can reuse the prepared plan across requests
+_DAILY_UPLOADS_STMT = (
+    select(
+        func.date_trunc('day', Document.created_at).label('date'),
+        func.count(Document.id).label('count')
+    ).where(
+        Document.created_at >= bindparam('start')
+    ).group_by(
+        func.date_trunc('day', Document.created_at)
+    ).order_by('date')
+)
+
+_PROCESSING_TIMES_STMT = (
+    select(
+        func.date_trunc('day', Document.created_at).label('date'),
+        func.avg(
+            func.extract('epoch', Document.updated_at - Document.created_at)
+        ).label('avg_processing_time')
+    ).where(
+        Document.created_at >= bindparam('start'),
+        Document.status == 'completed'
+    ).group_by(
+        func.date_trunc('day', Document.created_at)
+    ).order_by('date')
+)
+
 @router.get("/dashboard", response_model=AnalyticsResponse)
-def get_dashboard_analytics(db: Session = Depends(get_db)):
+@cache(expire=5, namespace="analytics", key_builder=deterministic_key_builder)
+async def get_dashboard_analytics(db: AsyncSession = Depends(get_async_db)):
     """Get dashboard analytics summary"""
-    
-    # Total documents
-    total_documents = db.query(Document).count()
-    
+
     # Documents by type
-    doc_types = db.query(
-        Document.doc_type, 
-        func.count(Document.id).label('count')
-    ).group_by(Document.doc_type).all()
-    
+    doc_types = (await db.execute(
+        select(Document.doc_type, func.count(Document.id).label('count'))
+        .group_by(Document.doc_type)
+    )).all()
+
     documents_by_type = {doc_type: count for doc_type, count in doc_types if doc_type}
-    
-    # Processing statistics
+
+    # Processing statistics: one GROUP BY scan instead of a count query per
+    # status, with the total derived from the same result set
+    status_counts = dict((await db.execute(
+        select(Document.status, func.count(Document.id))
+        .group_by(Document.status)
+    )).all())
+
+    total_documents = sum(status_counts.values())
     processing_stats = {
-        "pending": db.query(Document).filter(Document.status == 'pending').count(),
-        "processing": db.query(Document).filter(Document.status == 'processing').count(),
-        "completed": db.query(Document).filter(Document.status == 'completed').count(),
-        "failed": db.query(Document).filter(Document.status == 'failed').count(),
+        doc_status: status_counts.get(doc_status, 0)
+        for doc_status in ('pending', 'processing', 'completed', 'failed')
     }
-    
-    # User workload
-    user_workload = db.query(
-        User.username,
-        User.full_name,
-        func.count(DocumentAssignment.id).label('active_assignments')
-    ).outerjoin(
-        DocumentAssignment,
-        (DocumentAssignment.user_id == User.id) & 
-        (DocumentAssignment.status.in_(['assigned', 'in_progress']))
-    ).group_by(User.id, User.username, User.full_name).all()
-    
+
+    # User workload: pre-aggregate active assignments per user so the join
+    # stays O(users) instead of widening to every historical assignment
+    active_counts = (
+        select(
+            DocumentAssignment.user_id,
+            func.count().label('n')
+        ).where(
+            DocumentAssignment.status.in_(['assigned', 'in_progress'])
+        ).group_by(DocumentAssignment.user_id)
+    ).subquery()
+
+    user_workload = (await db.execute(
+        select(
+            User.username,
+            User.full_name,
+            func.coalesce(active_counts.c.n, 0).label('active_assignments')
+        ).outerjoin(active_counts, active_counts.c.user_id == User.id)
+    )).all()
+
     user_workload_list = [
         {
             "username": username,
@@ -52,7 +92,7 @@ def get_dashboard_analytics(db: Session = Depends(get_db)):
         }
         for username, full_name, active_assignments in user_workload
     ]
-    
+
     return AnalyticsResponse(
         total_documents=total_documents,
         documents_by_type=documents_by_type,
@@ -61,66 +101,60 @@ def get_dashboard_analytics(db: Session = Depends(get_db)):
     )
 
 @router.get("/trends")
-def get_trends(
+async def get_trends(
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get document processing trends over time"""
-    
+
     start_date = datetime.utcnow() - timedelta(days=days)
-    
+
     # Documents uploaded per day
-    daily_uploads = db.query(
-        func.date(Document.created_at).label('date'),
-        func.count(Document.id).label('count')
-    ).filter(
-        Document.created_at >= start_date
-    ).group_by(
-        func.date(Document.created_at)
-    ).order_by('date').all()
-    
+    daily_uploads = (await db.execute(
+        _DAILY_UPLOADS_STMT, {"start": start_date}
+    )).all()
+
     # Processing time trends
-    processing_times = db.query(
-        func.date(Document.created_at).label('date'),
-        func.avg(
-            func.extract('epoch', Document.updated_at - Document.created_at)
-        ).label('avg_processing_time')
-    ).filter(
-        Document.created_at >= start_date,
-        Document.status == 'completed'
-    ).group_by(
-        func.date(Document.created_at)
-    ).order_by('date').all()
-    
+    processing_times = (await db.execute(
+        _PROCESSING_TIMES_STMT, {"start": start_date}
+    )).all()
+
+    # orjson serializes date objects natively, so no str() conversion needed
     return {
         "daily_uploads": [
-            {"date": str(date), "count": count}
+            {"date": date, "count": count}
             for date, count in daily_uploads
         ],
         "processing_times": [
-            {"date": str(date), "avg_processing_time_seconds": float(avg_time) if avg_time else 0}
+            {"date": date, "avg_processing_time_seconds": float(avg_time) if avg_time else 0}
             for date, avg_time in processing_times
         ]
     }
 
 @router.get("/classification-accuracy")
-def get_classification_accuracy(db: Session = Depends(get_db)):
+@cache(expire=5, namespace="analytics", key_builder=deterministic_key_builder)
+async def get_classification_accuracy(db: AsyncSession = Depends(get_async_db)):
     """Get classification accuracy metrics"""
-    
-    # High confidence classifications (>0.9)
-    high_confidence = db.query(Document).filter(Document.confidence > 0.9).count()
-    
-    # Medium confidence classifications (0.7-0.9)
-    medium_confidence = db.query(Document).filter(
-        Document.confidence >= 0.7,
-        Document.confidence <= 0.9
-    ).count()
-    
-    # Low confidence classifications (<0.7)
-    low_confidence = db.query(Document).filter(Document.confidence < 0.7).count()
-    
+
+    # Bucket confidence in a single scan instead of three count queries
+    bucket = case(
+        (Document.confidence > 0.9, 'high'),
+        (Document.confidence >= 0.7, 'medium'),
+        else_='low'
+    ).label('bucket')
+
+    bucket_counts = dict((await db.execute(
+        select(bucket, func.count(Document.id))
+        .where(Document.confidence.isnot(None))
+        .group_by(bucket)
+    )).all())
+
+    high_confidence = bucket_counts.get('high', 0)
+    medium_confidence = bucket_counts.get('medium', 0)
+    low_confidence = bucket_counts.get('low', 0)
+
     total_classified = high_confidence + medium_confidence + low_confidence
-    
+
     return {
         "total_classified": total_classified,
         "high_confidence": high_confidence,
@@ -134,33 +168,44 @@ def get_classification_accuracy(db: Session = Depends(get_db)):
     }
 
 @router.get("/search")
-def search_documents(
+async def search_documents(
     query: str = Query(..., min_length=1),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Search documents by content"""
-    
-    # Simple text search in document names and summaries
-    documents = db.query(Document, Metadata).outerjoin(
-        Metadata, Document.id == Metadata.doc_id
-    ).filter(
-        (Document.original_name.ilike(f"%{query}%")) |
-        (Metadata.summary.ilike(f"%{query}%"))
-    ).limit(limit).all()
-    
+
+    # Full-text search over the trigger-maintained search_vec (name + summary),
+    # ranked by relevance; the GIN index answers this in log-time
+    ts_query = func.websearch_to_tsquery('english', query)
+    documents = (await db.execute(
+        select(Document)
+        .where(Document.search_vec.op('@@')(ts_query))
+        .order_by(func.ts_rank(Document.search_vec, ts_query).desc())
+        .limit(limit)
+    )).scalars().all()
+
+    # Fetch summaries only for the hits instead of outer-joining all metadata
+    summaries = {}
+    if documents:
+        summaries = dict((await db.execute(
+            select(Metadata.doc_id, Metadata.summary).where(
+                Metadata.doc_id.in_([doc.id for doc in documents])
+            )
+        )).all())
+
     results = []
-    for doc, metadata in documents:
+    for doc in documents:
         result = {
             "id": doc.id,
             "original_name": doc.original_name,
             "doc_type": doc.doc_type,
             "confidence": doc.confidence,
-            "summary": metadata.summary if metadata else None,
+            "summary": summaries.get(doc.id),
             "created_at": doc.created_at
         }
         results.append(result)
-    
+
     return {
         "query": query,
         "total_results": len(results),
@@ -1,8 +1,9 @@
 
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from libs.database.connection import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from libs.database.connection import get_async_db
 from libs.database.models import User
 from libs.utils.auth import create_access_token, get_password_hash, verify_password
 from ..schemas import LoginRequest, TokenResponse, UserCreate, UserResponse
@@ -11,12 +12,14 @@ router = APIRouter()
 security = HTTPBearer()
 
 @router.post("/login", response_model=TokenResponse)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Authenticate user and return access token"""
     # For demo purposes, using simple username/password
     # In production, use proper password hashing
-    user = db.query(User).filter(User.username == login_data.username).first()
-    
+    user = (await db.execute(
+        select(User).where(User.username == login_data.username)
+    )).scalar_one_or_none()
+
     if not user:
         # Create default user if not exists (for demo)
         user = User(
@@ -25,30 +28,32 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
             full_name=f"User {login_data.username}"
         )
         db.add(user)
-        db.commit()
-    
+        await db.commit()
+
     # Create access token
     access_token = create_access_token(data={"sub": user.username})
     return TokenResponse(access_token=access_token)
 
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    existing_user = db.query(User).filter(
-        (User.username == user_data.username) | (User.email == user_data.email)
-    ).first()
-    
+    existing_user = (await db.execute(
+        select(User).where(
+            (User.username == user_data.username) | (User.email == user_data.email)
+        )
+    )).scalars().first()
+
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username or email already registered"
         )
-    
+
     # Create new user
     user = User(**user_data.dict())
     db.add(user)
-    db.commit()
-    db.refresh(user)
-    
-    return UserResponse.from_orm(user)
+    await db.commit()
+    await db.refresh(user)
+
+    return UserResponse.model_validate(user)
@@ -1,48 +1,71 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select, tuple_
 from typing import List, Optional
-from libs.database.connection import get_db
+from datetime import datetime
+from libs.database.connection import get_async_db
 from libs.database.models import Document, Metadata, DocumentAssignment
 from ..schemas import DocumentResponse
+from fastapi_cache import FastAPICache
+from pydantic import TypeAdapter
 import uuid
 
 router = APIRouter()
 
+# Batch-validates whole result pages in pydantic-core instead of per-row from_orm
+_DOC_LIST_ADAPTER = TypeAdapter(List[DocumentResponse])
+
 @router.get("/", response_model=List[DocumentResponse])
-def get_documents(
-    skip: int = Query(0, ge=0),
+async def get_documents(
     limit: int = Query(100, ge=1, le=1000),
     doc_type: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    after: Optional[datetime] = Query(None, description="created_at of the last row on the previous page"),
+    after_id: Optional[uuid.UUID] = Query(None, description="id of the last row on the previous page"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get list of documents with optional filtering"""
-    query = db.query(Document)
-    
+    """Get list of documents with optional filtering.
+
+    Pagination is keyset-based: pass the created_at/id of the last row of the
+    previous page as after/after_id instead of an offset, so deep pages cost
+    an index range scan rather than scanning and discarding skipped rows.
+    """
+    query = select(Document)
+
     if doc_type:
-        query = query.filter(Document.doc_type == doc_type)
+        query = query.where(Document.doc_type == doc_type)
     if status:
-        query = query.filter(Document.status == status)
-    
-    documents = query.offset(skip).limit(limit).all()
-    return [DocumentResponse.from_orm(doc) for doc in documents]
+        query = query.where(Document.status == status)
+    if after is not None and after_id is not None:
+        query = query.where(
+            tuple_(Document.created_at, Document.id) < (after, after_id)
+        )
+
+    query = query.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit)
+    documents = (await db.execute(query)).scalars().all()
+    return _DOC_LIST_ADAPTER.validate_python(documents)
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-def get_document(document_id: uuid.UUID, db: Session = Depends(get_db)):
+async def get_document(document_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
     """Get a specific document by ID"""
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = (await db.execute(
+        select(Document).where(Document.id == document_id)
+    )).scalar_one_or_none()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
-    return DocumentResponse.from_orm(document)
+    return DocumentResponse.model_validate(document)
 
 @router.get("/{document_id}/metadata")
-def get_document_metadata(document_id: uuid.UUID, db: Session = Depends(get_db)):
+async def get_document_metadata(document_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
     """Get document metadata"""
-    metadata = db.query(Metadata).filter(Metadata.doc_id == document_id).first()
+    metadata = (await db.execute(
+        select(Metadata).where(Metadata.doc_id == document_id)
+    )).scalar_one_or_none()
     if not metadata:
         raise HTTPException(status_code=404, detail="Metadata not found")
-    
+
     return {
         "doc_id": metadata.doc_id,
         "key_entities": metadata.key_entities,
@@ -55,16 +78,23 @@ def get_document_metadata(document_id: uuid.UUID, db: Session = Depends(get_db))
     }
 
 @router.get("/{document_id}/assignments")
-def get_document_assignments(document_id: uuid.UUID, db: Session = Depends(get_db)):
+async def get_document_assignments(document_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
     """Get document assignments"""
-    assignments = db.query(DocumentAssignment).filter(
-        DocumentAssignment.doc_id == document_id
-    ).all()
-    
+    # selectinload batches the user lookups into one IN-query instead of a
+    # lazy load per assignment row
+    assignments = (await db.execute(
+        select(DocumentAssignment).options(
+            selectinload(DocumentAssignment.user)
+        ).where(
+            DocumentAssignment.doc_id == document_id
+        )
+    )).scalars().all()
+
     return [
         {
             "id": assignment.id,
             "user_id": assignment.user_id,
+            "username": assignment.user.username if assignment.user else None,
             "status": assignment.status,
             "priority": assignment.priority,
             "due_date": assignment.due_date,
@@ -74,12 +104,15 @@ def get_document_assignments(document_id: uuid.UUID, db: Session = Depends(get_d
     ]
 
 @router.delete("/{document_id}")
-def delete_document(document_id: uuid.UUID, db: Session = Depends(get_db)):
+async def delete_document(document_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
     """Delete a document"""
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = (await db.execute(
+        select(Document).where(Document.id == document_id)
+    )).scalar_one_or_none()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    db.delete(document)
-    db.commit()
+
+    await db.delete(document)
+    await db.commit()
+    await FastAPICache.clear(namespace="analytics")
     return {"message": "Document deleted successfully"}
@@ -1,92 +1,120 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import List, Optional
-from libs.database.connection import get_db
+from libs.database.connection import get_async_db
 from libs.database.models import RoutingRule, DocumentAssignment
+from libs.utils.rules import compile_rule
 from ..schemas import RoutingRuleCreate, RoutingRuleResponse
+from pydantic import TypeAdapter
 
 router = APIRouter()
 
+_RULE_LIST_ADAPTER = TypeAdapter(List[RoutingRuleResponse])
+
+
+def _validate_condition(condition):
+    """Reject malformed rule conditions at write time
+
+    The routing engine compiles and caches its own predicates; compiling
+    here only proves the condition shape is something it will accept,
+    before the rule is persisted.
+    """
+    try:
+        compile_rule(condition)
+    except Exception:
+        raise HTTPException(status_code=422, detail="Invalid routing rule condition")
+
 @router.get("/rules", response_model=List[RoutingRuleResponse])
-def get_routing_rules(
+async def get_routing_rules(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     is_active: Optional[bool] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get list of routing rules"""
-    query = db.query(RoutingRule)
-    
+    query = select(RoutingRule)
+
     if is_active is not None:
-        query = query.filter(RoutingRule.is_active == is_active)
-    
-    rules = query.offset(skip).limit(limit).all()
-    return [RoutingRuleResponse.from_orm(rule) for rule in rules]
+        query = query.where(RoutingRule.is_active == is_active)
+
+    rules = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+    return _RULE_LIST_ADAPTER.validate_python(rules)
 
 @router.post("/rules", response_model=RoutingRuleResponse)
-def create_routing_rule(rule_data: RoutingRuleCreate, db: Session = Depends(get_db)):
+async def create_routing_rule(rule_data: RoutingRuleCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new routing rule"""
+    _validate_condition(rule_data.condition)
+
     rule = RoutingRule(**rule_data.dict())
     db.add(rule)
-    db.commit()
-    db.refresh(rule)
-    
-    return RoutingRuleResponse.from_orm(rule)
+    await db.commit()
+    await db.refresh(rule)
+
+    return RoutingRuleResponse.model_validate(rule)
 
 @router.get("/rules/{rule_id}", response_model=RoutingRuleResponse)
-def get_routing_rule(rule_id: int, db: Session = Depends(get_db)):
+async def get_routing_rule(rule_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific routing rule"""
-    rule = db.query(RoutingRule).filter(RoutingRule.id == rule_id).first()
+    rule = (await db.execute(
+        select(RoutingRule).where(RoutingRule.id == rule_id)
+    )).scalar_one_or_none()
     if not rule:
         raise HTTPException(status_code=404, detail="Routing rule not found")
-    return RoutingRuleResponse.from_orm(rule)
+    return RoutingRuleResponse.model_validate(rule)
 
 @router.put("/rules/{rule_id}", response_model=RoutingRuleResponse)
-def update_routing_rule(
-    rule_id: int, 
-    rule_data: RoutingRuleCreate, 
-    db: Session = Depends(get_db)
+async def update_routing_rule(
+    rule_id: int,
+    rule_data: RoutingRuleCreate,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a routing rule"""
-    rule = db.query(RoutingRule).filter(RoutingRule.id == rule_id).first()
+    rule = (await db.execute(
+        select(RoutingRule).where(RoutingRule.id == rule_id)
+    )).scalar_one_or_none()
     if not rule:
         raise HTTPException(status_code=404, detail="Routing rule not found")
-    
+
+    _validate_condition(rule_data.condition)
+
     for field, value in rule_data.dict(exclude_unset=True).items():
         setattr(rule, field, value)
-    
-    db.commit()
-    db.refresh(rule)
-    
-    return RoutingRuleResponse.from_orm(rule)
+
+    await db.commit()
+    await db.refresh(rule)
+
+    return RoutingRuleResponse.model_validate(rule)
 
 @router.delete("/rules/{rule_id}")
-def delete_routing_rule(rule_id: int, db: Session = Depends(get_db)):
+async def delete_routing_rule(rule_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a routing rule"""
-    rule = db.query(RoutingRule).filter(RoutingRule.id == rule_id).first()
+    rule = (await db.execute(
+        select(RoutingRule).where(RoutingRule.id == rule_id)
+    )).scalar_one_or_none()
     if not rule:
         raise HTTPException(status_code=404, detail="Routing rule not found")
-    
-    db.delete(rule)
-    db.commit()
+
+    await db.delete(rule)
+    await db.commit()
     return {"message": "Routing rule deleted successfully"}
 
 @router.get("/assignments")
-def get_assignments(
+async def get_assignments(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get document assignments"""
-    query = db.query(DocumentAssignment)
-    
+    query = select(DocumentAssignment)
+
     if status:
-        query = query.filter(DocumentAssignment.status == status)
-    
-    assignments = query.offset(skip).limit(limit).all()
-    
+        query = query.where(DocumentAssignment.status == status)
+
+    assignments = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+
     return [
         {
             "id": assignment.id,
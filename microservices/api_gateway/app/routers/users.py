@@ -1,99 +1,146 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, case, exists, or_
 from typing import List, Optional
-from libs.database.connection import get_db
+from libs.database.connection import get_async_db
 from libs.database.models import User, DocumentAssignment
 from ..schemas import UserResponse, UserCreate
+from pydantic import TypeAdapter
+from fastapi_cache import FastAPICache
+from fastapi_cache.decorator import cache
+from ..cache import deterministic_key_builder
 import uuid
 
 router = APIRouter()
 
+_USER_LIST_ADAPTER = TypeAdapter(List[UserResponse])
+
 @router.get("/", response_model=List[UserResponse])
-def get_users(
+async def get_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     role: Optional[str] = Query(None),
     department: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get list of users with optional filtering"""
-    query = db.query(User)
-    
+    # Project only the response columns: lightweight Row tuples skip ORM
+    # identity-map hydration and the unused skills JSON
+    query = select(
+        User.id, User.username, User.email, User.full_name,
+        User.role, User.department, User.is_active
+    )
+
     if role:
-        query = query.filter(User.role == role)
+        query = query.where(User.role == role)
     if department:
-        query = query.filter(User.department == department)
-    
-    users = query.offset(skip).limit(limit).all()
-    return [UserResponse.from_orm(user) for user in users]
+        query = query.where(User.department == department)
+
+    rows = (await db.execute(
+        query.order_by(User.id).offset(skip).limit(limit)
+    )).all()
+    return _USER_LIST_ADAPTER.validate_python(rows)
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: uuid.UUID, db: Session = Depends(get_db)):
+@cache(expire=300, namespace="users", key_builder=deterministic_key_builder)
+async def get_user(user_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
     """Get a specific user by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(
+        select(User).where(User.id == user_id)
+    )).scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return UserResponse.from_orm(user)
+    return UserResponse.model_validate(user)
 
 @router.get("/{user_id}/workload")
-def get_user_workload(user_id: uuid.UUID, db: Session = Depends(get_db)):
+async def get_user_workload(user_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
     """Get user's current workload"""
-    assignments = db.query(DocumentAssignment).filter(
-        DocumentAssignment.user_id == user_id,
-        DocumentAssignment.status.in_(['assigned', 'in_progress'])
-    ).all()
-    
+    active = DocumentAssignment.status.in_(['assigned', 'in_progress'])
+
+    # Aggregate the priority buckets in one query instead of pulling full
+    # ORM rows and counting them in Python
+    counts = (await db.execute(
+        select(
+            func.count().label("active"),
+            func.coalesce(func.sum(case((DocumentAssignment.priority >= 4, 1), else_=0)), 0).label("high"),
+            func.coalesce(func.sum(case((DocumentAssignment.priority == 3, 1), else_=0)), 0).label("medium"),
+            func.coalesce(func.sum(case((DocumentAssignment.priority <= 2, 1), else_=0)), 0).label("low"),
+        ).where(DocumentAssignment.user_id == user_id, active)
+    )).one()
+
+    assignments = (await db.execute(
+        select(
+            DocumentAssignment.id,
+            DocumentAssignment.doc_id,
+            DocumentAssignment.status,
+            DocumentAssignment.priority,
+            DocumentAssignment.due_date,
+            DocumentAssignment.created_at
+        ).where(DocumentAssignment.user_id == user_id, active)
+    )).all()
+
     workload_summary = {
         "user_id": user_id,
-        "active_assignments": len(assignments),
-        "high_priority": len([a for a in assignments if a.priority >= 4]),
-        "medium_priority": len([a for a in assignments if a.priority == 3]),
-        "low_priority": len([a for a in assignments if a.priority <= 2]),
+        "active_assignments": counts.active,
+        "high_priority": counts.high,
+        "medium_priority": counts.medium,
+        "low_priority": counts.low,
         "assignments": [
             {
-                "id": assignment.id,
-                "doc_id": assignment.doc_id,
-                "status": assignment.status,
-                "priority": assignment.priority,
-                "due_date": assignment.due_date,
-                "created_at": assignment.created_at
+                "id": row.id,
+                "doc_id": row.doc_id,
+                "status": row.status,
+                "priority": row.priority,
+                "due_date": row.due_date,
+                "created_at": row.created_at
             }
-            for assignment in assignments
+            for row in assignments
         ]
     }
-    
+
     return workload_summary
 
 @router.post("/", response_model=UserResponse)
-def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new user"""
-    # Check if user already exists
-    existing_user = db.query(User).filter(
-        (User.username == user_data.username) | (User.email == user_data.email)
-    ).first()
-    
-    if existing_user:
+    # Check if user already exists; EXISTS probes the unique indexes on
+    # username/email without hydrating a row
+    duplicate = (await db.execute(
+        select(exists().where(or_(
+            User.username == user_data.username,
+            User.email == user_data.email
+        )))
+    )).scalar()
+
+    if duplicate:
         raise HTTPException(status_code=400, detail="Username or email already exists")
-    
+
     user = User(**user_data.dict())
     db.add(user)
-    db.commit()
-    db.refresh(user)
-    
-    return UserResponse.from_orm(user)
+    await db.commit()
+    await db.refresh(user)
+
+    await FastAPICache.clear(namespace="users")
+
+    return UserResponse.model_validate(user)
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(user_id: uuid.UUID, user_data: UserCreate, db: Session = Depends(get_db)):
+async def update_user(user_id: uuid.UUID, user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Update a user"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(
+        select(User).where(User.id == user_id)
+    )).scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
+
     for field, value in user_data.dict(exclude_unset=True).items():
         setattr(user, field, value)
-    
-    db.commit()
-    db.refresh(user)
-    
-    return UserResponse.from_orm(user)
+
+    await db.commit()
+    await db.refresh(user)
+
+    # Writes drop the cached profiles so readers never see stale rows
+    await FastAPICache.clear(namespace="users")
+
+    return UserResponse.model_validate(user)
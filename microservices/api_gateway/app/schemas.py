@@ -1,5 +1,5 @@
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import uuid
@@ -15,8 +15,7 @@ class DocumentResponse(BaseModel):
     status: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserCreate(BaseModel):
     username: str
@@ -35,8 +34,7 @@ class UserResponse(BaseModel):
     department: Optional[str]
     is_active: bool
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class RoutingRuleCreate(BaseModel):
     name: str
@@ -54,8 +52,7 @@ class RoutingRuleResponse(BaseModel):
     priority: int
     is_active: bool
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class LoginRequest(BaseModel):
     username: str
@@ -73,8 +70,7 @@ class AssignmentResponse(BaseModel):
     priority: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AnalyticsResponse(BaseModel):
     total_documents: int
@@ -1,67 +1,150 @@
 
-import spacy
 import re
+import ahocorasick
+import hashlib
 from typing import Dict, Any, List
 from datetime import datetime
 import openai
 import os
 
+from libs.utils.cache import cache_get, cache_setex
+from .classifier import get_nlp
+
+# Summaries for identical prompts are served from Redis instead of a new
+# OpenAI round trip
+SUMMARY_CACHE_TTL = 86400
+
+# The keyword heuristics (language, sentiment, topics, risk) saturate after
+# a few KB; cap their scan at the first and last window of very long
+# documents so their cost is bounded regardless of document size
+_HEURISTIC_WINDOW = 32 * 1024
+
+# One client per process: it keeps a persistent connection pool, so
+# consecutive summarization calls reuse the HTTPS connection
+_openai_client = None
+
+def _get_openai_client():
+    global _openai_client
+    if _openai_client is None and os.getenv("OPENAI_API_KEY"):
+        _openai_client = openai.OpenAI()
+    return _openai_client
+
+# Entity/pattern regexes compiled once at import; the union pattern with
+# named groups buckets every match from a single scan of the text
+_MASTER_RE = re.compile(
+    r"(?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)"
+    r"|(?P<url>https?://[^\s]+)"
+    r"|(?P<amount>\$\d+(?:,\d{3})*(?:\.\d{2})?|\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:USD|dollars))"
+    r"|(?P<date>\d{1,2}/\d{1,2}/\d{4}|\d{1,2}-\d{1,2}-\d{4}|\b\d{1,2}\s+\w+\s+\d{4}\b)"
+    r"|(?P<phone>\b\d{3}[-.]?\d{3}[-.]?\d{4}\b)"
+    r"|(?i:(?:REF|Reference|ID|Number):\s*(?P<ref>[A-Z0-9-]+)\b)"
+)
+
+def _scan_patterns(text: str) -> Dict[str, List[str]]:
+    """Bucket all regex pattern matches from one pass over the text"""
+    buckets = {'email': [], 'url': [], 'amount': [], 'date': [], 'phone': [], 'ref': []}
+    for match in _MASTER_RE.finditer(text):
+        group = match.lastgroup
+        buckets[group].append(match.group(group))
+    return buckets
+
 class ContentAnalyzer:
     def __init__(self):
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("spaCy English model not found")
-            self.nlp = None
-        
-        # Set OpenAI API key if available
-        openai.api_key = os.getenv("OPENAI_API_KEY")
+        # Shared per-process model; avoids a second ~50 MB copy alongside
+        # DocumentClassifier's
+        self.nlp = get_nlp()
         
-        # Risk keywords for compliance scanning
+        # Keyword sets for compliance scanning and the topic/sentiment/
+        # language heuristics; frozensets so each analysis is a single set
+        # intersection against the scan's hit set
         self.risk_keywords = {
-            'high_risk': ['confidential', 'classified', 'restricted', 'private', 'sensitive'],
-            'financial_risk': ['payment', 'credit card', 'ssn', 'social security', 'bank account'],
-            'legal_risk': ['lawsuit', 'litigation', 'breach', 'violation', 'penalty'],
-            'compliance_risk': ['gdpr', 'hipaa', 'sox', 'regulation', 'compliance']
+            'high_risk': frozenset(['confidential', 'classified', 'restricted', 'private', 'sensitive']),
+            'financial_risk': frozenset(['payment', 'credit card', 'ssn', 'social security', 'bank account']),
+            'legal_risk': frozenset(['lawsuit', 'litigation', 'breach', 'violation', 'penalty']),
+            'compliance_risk': frozenset(['gdpr', 'hipaa', 'sox', 'regulation', 'compliance'])
         }
-    
-    def analyze_content(self, file_path: str) -> Dict[str, Any]:
-        """Perform comprehensive content analysis"""
-        
-        # Import classifier to get extracted text
-        from .classifier import DocumentClassifier
-        classifier = DocumentClassifier()
-        text = classifier.extract_text_from_file(file_path)
-        
+        self.topic_keywords = {
+            'business': frozenset(['business', 'company', 'corporate', 'meeting', 'strategy', 'market']),
+            'legal': frozenset(['legal', 'law', 'court', 'judge', 'attorney', 'contract', 'agreement']),
+            'financial': frozenset(['money', 'payment', 'invoice', 'budget', 'cost', 'price', 'financial']),
+            'technical': frozenset(['technical', 'software', 'system', 'development', 'programming', 'data']),
+            'personal': frozenset(['personal', 'private', 'individual', 'family'])
+        }
+        self.positive_words = frozenset(['good', 'excellent', 'great', 'positive', 'success', 'approve', 'agree'])
+        self.negative_words = frozenset(['bad', 'terrible', 'negative', 'fail', 'reject', 'disagree', 'problem'])
+        self.language_words = {
+            'en': frozenset(['the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by']),
+            'es': frozenset(['el', 'la', 'los', 'las', 'y', 'o', 'pero', 'en', 'de', 'con', 'por', 'para']),
+            'fr': frozenset(['le', 'la', 'les', 'et', 'ou', 'mais', 'dans', 'de', 'avec', 'par', 'pour'])
+        }
+
+        # One Aho-Corasick automaton over every keyword list: a single linear
+        # scan of the text replaces one substring search per keyword
+        self._automaton = ahocorasick.Automaton()
+        all_keyword_lists = (
+            list(self.risk_keywords.values())
+            + list(self.topic_keywords.values())
+            + list(self.language_words.values())
+            + [self.positive_words, self.negative_words]
+        )
+        for keywords in all_keyword_lists:
+            for keyword in keywords:
+                self._automaton.add_word(keyword, keyword)
+        self._automaton.make_automaton()
+
+    def _scan_keywords(self, text_lower: str) -> set:
+        """Collect every known keyword occurring in the text in one pass"""
+        return {keyword for _, keyword in self._automaton.iter(text_lower)}
+
+    def analyze_content(self, text: str) -> Dict[str, Any]:
+        """Perform comprehensive content analysis on already-extracted text
+
+        The classifier has extracted the text once; taking it directly avoids
+        a second parse/OCR pass and a throwaway DocumentClassifier instance.
+        """
         if not text.strip():
             return self._empty_analysis()
-        
+
+        # Lowercase once and scan for all keywords in a single pass; the
+        # keyword-based analyses below just look up the hit set. Very long
+        # documents are sampled head+tail — the densities these heuristics
+        # produce are already ratios, so the sample stands in for the whole.
+        if len(text) <= 2 * _HEURISTIC_WINDOW:
+            sample = text
+        else:
+            sample = text[:_HEURISTIC_WINDOW] + text[-_HEURISTIC_WINDOW:]
+        matched = self._scan_keywords(sample.lower())
+        total_words = len(sample.split())
+
+        # Regex entities and patterns come from the same single scan
+        pattern_hits = _scan_patterns(text)
+
         analysis = {}
-        
+
         # Extract entities
-        analysis['entities'] = self._extract_entities(text)
-        
+        analysis['entities'] = self._extract_entities(text, pattern_hits)
+
         # Generate summary
         analysis['summary'] = self._generate_summary(text)
-        
+
         # Detect language
-        analysis['language'] = self._detect_language(text)
-        
+        analysis['language'] = self._detect_language(matched)
+
         # Analyze sentiment
-        analysis['sentiment'] = self._analyze_sentiment(text)
-        
+        analysis['sentiment'] = self._analyze_sentiment(matched, total_words)
+
         # Extract topics
-        analysis['topics'] = self._extract_topics(text)
-        
+        analysis['topics'] = self._extract_topics(matched, total_words)
+
         # Assess risk
-        analysis['risk_score'] = self._assess_risk(text)
-        
+        analysis['risk_score'] = self._assess_risk(matched)
+
         # Find related patterns
-        analysis['patterns'] = self._find_patterns(text)
-        
+        analysis['patterns'] = self._find_patterns(pattern_hits)
+
         return analysis
     
-    def _extract_entities(self, text: str) -> Dict[str, List[str]]:
+    def _extract_entities(self, text: str, pattern_hits: Dict[str, List[str]]) -> Dict[str, List[str]]:
         """Extract named entities from text"""
         entities = {
             'persons': [],
@@ -88,13 +171,9 @@ class ContentAnalyzer:
                 elif ent.label_ in ["GPE", "LOC"]:
                     entities['locations'].append(ent.text)
         
-        # Extract emails using regex
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        entities['emails'] = re.findall(email_pattern, text)
-        
-        # Extract phone numbers using regex
-        phone_pattern = r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'
-        entities['phone_numbers'] = re.findall(phone_pattern, text)
+        # Emails and phone numbers come from the shared regex scan
+        entities['emails'] = pattern_hits['email']
+        entities['phone_numbers'] = pattern_hits['phone']
         
         # Remove duplicates and limit results
         for key in entities:
@@ -105,16 +184,24 @@ class ContentAnalyzer:
     def _generate_summary(self, text: str) -> str:
         """Generate document summary"""
         # If OpenAI is available, use it for better summaries
-        if openai.api_key and len(text) > 100:
+        client = _get_openai_client()
+        if client and len(text) > 100:
+            prompt = text[:2000]
+            cache_key = f"sum:{hashlib.sha256(prompt.encode()).hexdigest()}"
+            cached = cache_get(cache_key)
+            if cached:
+                return cached
             try:
-                response = openai.ChatCompletion.create(
+                response = client.chat.completions.create(
                     model="gpt-3.5-turbo",
                     messages=[
-                        {"role": "user", "content": f"Summarize this document in 2-3 sentences:\n\n{text[:2000]}"}
+                        {"role": "user", "content": f"Summarize this document in 2-3 sentences:\n\n{prompt}"}
                     ],
                     max_tokens=150
                 )
-                return response.choices[0].message.content.strip()
+                summary = response.choices[0].message.content.strip()
+                cache_setex(cache_key, SUMMARY_CACHE_TTL, summary)
+                return summary
             except Exception as e:
                 print(f"OpenAI summarization failed: {e}")
         
@@ -132,19 +219,13 @@ class ContentAnalyzer:
         
         return '. '.join(summary_sentences)[:500]
     
-    def _detect_language(self, text: str) -> str:
+    def _detect_language(self, matched_keywords: set) -> str:
         """Detect document language"""
         # Simple language detection based on common words
-        english_words = ['the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by']
-        spanish_words = ['el', 'la', 'los', 'las', 'y', 'o', 'pero', 'en', 'de', 'con', 'por', 'para']
-        french_words = ['le', 'la', 'les', 'et', 'ou', 'mais', 'dans', 'de', 'avec', 'par', 'pour']
-        
-        text_lower = text.lower()
-        
-        en_count = sum(1 for word in english_words if word in text_lower)
-        es_count = sum(1 for word in spanish_words if word in text_lower)
-        fr_count = sum(1 for word in french_words if word in text_lower)
-        
+        en_count = len(self.language_words['en'] & matched_keywords)
+        es_count = len(self.language_words['es'] & matched_keywords)
+        fr_count = len(self.language_words['fr'] & matched_keywords)
+
         if en_count >= es_count and en_count >= fr_count:
             return 'en'
         elif es_count >= fr_count:
@@ -153,61 +234,36 @@ class ContentAnalyzer:
             return 'fr'
         else:
             return 'en'  # Default to English
-    
-    def _analyze_sentiment(self, text: str) -> float:
+
+    def _analyze_sentiment(self, matched_keywords: set, total_words: int) -> float:
         """Analyze sentiment of the document"""
         # Simple sentiment analysis using keyword matching
-        positive_words = ['good', 'excellent', 'great', 'positive', 'success', 'approve', 'agree']
-        negative_words = ['bad', 'terrible', 'negative', 'fail', 'reject', 'disagree', 'problem']
-        
-        text_lower = text.lower()
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        
-        total_words = len(text.split())
-        
+        positive_count = len(self.positive_words & matched_keywords)
+        negative_count = len(self.negative_words & matched_keywords)
+
         if total_words == 0:
             return 0.0
-        
+
         # Calculate sentiment score between -1 and 1
         sentiment_score = (positive_count - negative_count) / max(total_words / 100, 1)
         return max(-1, min(1, sentiment_score))
-    
-    def _extract_topics(self, text: str) -> Dict[str, float]:
+
+    def _extract_topics(self, matched_keywords: set, total_words: int) -> Dict[str, float]:
         """Extract main topics from document"""
-        topics = {
-            'business': 0,
-            'legal': 0,
-            'financial': 0,
-            'technical': 0,
-            'personal': 0
-        }
-        
-        topic_keywords = {
-            'business': ['business', 'company', 'corporate', 'meeting', 'strategy', 'market'],
-            'legal': ['legal', 'law', 'court', 'judge', 'attorney', 'contract', 'agreement'],
-            'financial': ['money', 'payment', 'invoice', 'budget', 'cost', 'price', 'financial'],
-            'technical': ['technical', 'software', 'system', 'development', 'programming', 'data'],
-            'personal': ['personal', 'private', 'individual', 'family', 'personal']
-        }
-        
-        text_lower = text.lower()
-        total_words = len(text.split())
-        
-        for topic, keywords in topic_keywords.items():
-            count = sum(1 for keyword in keywords if keyword in text_lower)
+        topics = {}
+
+        for topic, keywords in self.topic_keywords.items():
+            count = len(keywords & matched_keywords)
             topics[topic] = count / max(total_words / 100, 1)
-        
+
         return topics
-    
-    def _assess_risk(self, text: str) -> float:
+
+    def _assess_risk(self, matched_keywords: set) -> float:
         """Assess compliance and security risk"""
         risk_score = 0.0
-        text_lower = text.lower()
-        
+
         for risk_category, keywords in self.risk_keywords.items():
-            category_score = sum(1 for keyword in keywords if keyword in text_lower)
+            category_score = len(keywords & matched_keywords)
             
             # Weight different risk categories
             if risk_category == 'high_risk':
@@ -222,47 +278,15 @@ class ContentAnalyzer:
         # Normalize to 0-1 scale
         return min(1.0, risk_score / 10)
     
-    def _find_patterns(self, text: str) -> Dict[str, List[str]]:
+    def _find_patterns(self, pattern_hits: Dict[str, List[str]]) -> Dict[str, List[str]]:
         """Find common patterns in document"""
-        patterns = {
-            'dates': [],
-            'amounts': [],
-            'references': [],
-            'urls': []
-        }
-        
-        # Date patterns
-        date_patterns = [
-            r'\d{1,2}/\d{1,2}/\d{4}',
-            r'\d{1,2}-\d{1,2}-\d{4}',
-            r'\b\d{1,2}\s+\w+\s+\d{4}\b'
-        ]
-        
-        for pattern in date_patterns:
-            patterns['dates'].extend(re.findall(pattern, text))
-        
-        # Amount patterns
-        amount_patterns = [
-            r'\$\d+(?:,\d{3})*(?:\.\d{2})?',
-            r'\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:USD|dollars)',
-        ]
-        
-        for pattern in amount_patterns:
-            patterns['amounts'].extend(re.findall(pattern, text))
-        
-        # Reference patterns
-        ref_pattern = r'\b(?:REF|Reference|ID|Number):\s*([A-Z0-9-]+)\b'
-        patterns['references'] = re.findall(ref_pattern, text, re.IGNORECASE)
-        
-        # URL patterns
-        url_pattern = r'https?://[^\s]+'
-        patterns['urls'] = re.findall(url_pattern, text)
-        
         # Limit results
-        for key in patterns:
-            patterns[key] = patterns[key][:5]
-        
-        return patterns
+        return {
+            'dates': pattern_hits['date'][:5],
+            'amounts': pattern_hits['amount'][:5],
+            'references': pattern_hits['ref'][:5],
+            'urls': pattern_hits['url'][:5]
+        }
     
     def _empty_analysis(self) -> Dict[str, Any]:
         """Return empty analysis structure"""
@@ -1,34 +1,84 @@
 
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import uvicorn
-import json
+import orjson
 import os
-import threading
+import asyncio
+import aio_pika
+from concurrent.futures import ProcessPoolExecutor
 from libs.utils.messaging import mq
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from libs.utils.cache import cache_get, cache_setex, cache_delete
 from libs.database.connection import get_db_session
 from libs.database.models import Document, Metadata
 from .classifier import DocumentClassifier
 from .content_analyzer import ContentAnalyzer
 
-app = FastAPI(title="Document Classification Service")
+# Cached pipeline results are keyed by content hash; identical bytes skip
+# extraction, OCR, spaCy and summarization entirely
+RESULT_CACHE_TTL = 86400
 
-# Initialize classifier and content analyzer
-classifier = DocumentClassifier()
-content_analyzer = ContentAnalyzer()
+# Documents in flight at once; inference itself fans out to the process pool
+PREFETCH_COUNT = 16
 
-@app.on_event("startup")
-async def startup_event():
-    """Start message queue consumer"""
-    def start_consumer():
+app = FastAPI(title="Document Classification Service", default_response_class=ORJSONResponse)
+
+# CPU-bound classification runs in worker processes so every core is used;
+# each worker process lazily builds its own model instances
+process_pool = None
+_worker_classifier = None
+_worker_analyzer = None
+
+def classify_and_analyze(file_path: str):
+    """Run the full inference pipeline; executes inside a pool worker"""
+    global _worker_classifier, _worker_analyzer
+    if _worker_classifier is None:
+        _worker_classifier = DocumentClassifier()
+        _worker_analyzer = ContentAnalyzer()
+
+    classification_result = _worker_classifier.classify_document(file_path)
+    text = classification_result.pop('full_text', '')
+    content_result = _worker_analyzer.analyze_content(text)
+    return classification_result, content_result
+
+async def handle_document_message(message: aio_pika.abc.AbstractIncomingMessage):
+    """Ack-on-success wrapper around the blocking processing body"""
+    async with message.process():
         try:
-            mq.connect()
-            mq.consume_messages("document_processing", process_document_message)
+            payload = orjson.loads(message.body)
         except Exception as e:
-            print(f"Error starting consumer: {e}")
-    
-    # Start consumer in background thread
-    consumer_thread = threading.Thread(target=start_consumer, daemon=True)
-    consumer_thread.start()
+            print(f"Error decoding message: {e}")
+            return
+        # The DB work is sync SQLAlchemy; run it on the thread pool so the
+        # consumer keeps pulling up to PREFETCH_COUNT messages concurrently
+        await asyncio.to_thread(process_document, payload)
+
+async def consume_documents():
+    """Connect to RabbitMQ and consume the processing queue asynchronously"""
+    connection = await aio_pika.connect_robust(
+        host=os.getenv("RABBITMQ_HOST", "localhost"),
+        port=int(os.getenv("RABBITMQ_PORT", "5672")),
+        login=os.getenv("RABBITMQ_USER", "admin"),
+        password=os.getenv("RABBITMQ_PASSWORD", "secret"),
+    )
+    channel = await connection.channel()
+    await channel.set_qos(prefetch_count=PREFETCH_COUNT)
+    queue = await channel.declare_queue("document_processing", durable=True)
+    await queue.consume(handle_document_message)
+
+@app.on_event("startup")
+async def startup_event():
+    """Start the process pool, result publisher and message consumer"""
+    global process_pool
+    process_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+    try:
+        mq.connect()
+    except Exception as e:
+        print(f"Warning: Could not connect result publisher: {e}")
+
+    asyncio.create_task(consume_documents())
 
 @app.get("/health")
 async def health_check():
@@ -38,77 +88,94 @@ async def health_check():
 async def root():
     return {"message": "Document Classification Service"}
 
-def process_document_message(ch, method, properties, body):
+def process_document(message: dict):
     """Process incoming document for classification"""
+    document_id = message["document_id"]
+    file_path = message["file_path"]
+
+    print(f"Processing document {document_id}")
+
+    # Get database session
+    db = get_db_session()
+
     try:
-        message = json.loads(body)
-        document_id = message["document_id"]
-        file_path = message["file_path"]
-        
-        print(f"Processing document {document_id}")
-        
-        # Get database session
-        db = get_db_session()
-        
-        try:
-            # Get document from database
-            document = db.query(Document).filter(Document.id == document_id).first()
-            if not document:
-                print(f"Document {document_id} not found")
-                return
-            
-            # Update status to processing
-            document.status = 'processing'
-            db.commit()
-            
-            # Classify document
-            classification_result = classifier.classify_document(file_path)
-            
-            # Analyze content
-            content_result = content_analyzer.analyze_content(file_path)
-            
-            # Update document with classification results
-            document.doc_type = classification_result['doc_type']
-            document.confidence = classification_result['confidence']
-            document.status = 'classified'
-            
-            # Create or update metadata
-            metadata = db.query(Metadata).filter(Metadata.doc_id == document_id).first()
-            if not metadata:
-                metadata = Metadata(doc_id=document_id)
-                db.add(metadata)
-            
-            metadata.key_entities = content_result.get('entities', {})
-            metadata.summary = content_result.get('summary', '')
-            metadata.language = content_result.get('language', 'en')
-            metadata.sentiment_score = content_result.get('sentiment', 0.0)
-            metadata.topics = content_result.get('topics', {})
-            metadata.risk_score = content_result.get('risk_score', 0.0)
-            
-            db.commit()
-            
-            # Send result to routing engine
-            routing_message = {
-                "document_id": document_id,
-                "doc_type": classification_result['doc_type'],
-                "confidence": classification_result['confidence'],
-                "entities": content_result.get('entities', {}),
-                "risk_score": content_result.get('risk_score', 0.0),
-                "priority": classification_result.get('priority', 1)
-            }
-            
-            mq.publish_message("classification_results", routing_message)
-            print(f"Document {document_id} classified successfully")
-            
-        except Exception as e:
-            print(f"Error processing document {document_id}: {e}")
-            document.status = 'failed'
-            db.commit()
-        finally:
-            db.close()
-            
+        # Get document from database
+        document = db.query(Document).filter(Document.id == document_id).first()
+        if not document:
+            print(f"Document {document_id} not found")
+            return
+
+        # Track the transient processing state in Redis instead of paying a
+        # Postgres commit (and WAL fsync) for a row that is rewritten moments
+        # later; the durable status lands with the final commit below
+        cache_setex(f"doc_state:{document_id}", 3600, "processing")
+
+        # Reuse cached results when the identical content was already
+        # processed (cache-aside; Redis failures fall back to computing)
+        doc_hash = document.content_hash or DocumentClassifier.get_document_hash(file_path)
+        cached = cache_get(f"doc:{doc_hash}") if doc_hash else None
+
+        if cached:
+            result = orjson.loads(cached)
+            classification_result = result['classification']
+            content_result = result['content']
+            print(f"Cache hit for document {document_id} ({doc_hash})")
+        else:
+            # Classify and analyze on the process pool
+            classification_result, content_result = process_pool.submit(
+                classify_and_analyze, file_path
+            ).result()
+
+            if doc_hash:
+                cache_setex(f"doc:{doc_hash}", RESULT_CACHE_TTL, orjson.dumps({
+                    'classification': classification_result,
+                    'content': content_result
+                }).decode())
+
+        # Update document with classification results
+        document.doc_type = classification_result['doc_type']
+        document.confidence = classification_result['confidence']
+        document.status = 'classified'
+
+        # Upsert metadata in one statement instead of SELECT + add/update,
+        # and land it with the status change in a single commit
+        meta_values = {
+            'key_entities': content_result.get('entities', {}),
+            'summary': content_result.get('summary', ''),
+            'language': content_result.get('language', 'en'),
+            'sentiment_score': content_result.get('sentiment', 0.0),
+            'topics': content_result.get('topics', {}),
+            'risk_score': content_result.get('risk_score', 0.0)
+        }
+        db.execute(
+            pg_insert(Metadata).values(doc_id=document_id, **meta_values)
+            .on_conflict_do_update(index_elements=['doc_id'], set_=meta_values)
+        )
+
+        db.commit()
+        cache_delete(f"doc_state:{document_id}")
+
+        # Send result to routing engine
+        routing_message = {
+            "document_id": document_id,
+            "doc_type": classification_result['doc_type'],
+            "confidence": classification_result['confidence'],
+            "entities": content_result.get('entities', {}),
+            "risk_score": content_result.get('risk_score', 0.0),
+            "priority": classification_result.get('priority', 1)
+        }
+
+        mq.publish_message("classification_results", routing_message)
+        print(f"Document {document_id} classified successfully")
+
     except Exception as e:
-        print(f"Error processing message: {e}")
+        print(f"Error processing document {document_id}: {e}")
+        db.rollback()
+        document.status = 'failed'
+        db.commit()
+        cache_delete(f"doc_state:{document_id}")
+    finally:
+        db.close()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -1,28 +1,75 @@
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import uvicorn
-import json
+import logging
+import orjson
+import os
 import threading
+import time
+from libs.utils.logging import setup_queue_logging
 from libs.utils.messaging import mq
-from libs.database.connection import get_db_session
+from libs.database.connection import ScopedSession
 from libs.database.models import Document, RoutingRule, DocumentAssignment, User
 from .router import DocumentRouter
 
-app = FastAPI(title="Document Routing Engine")
+# Micro-batching knobs: drain up to BATCH_SIZE classification results, or
+# whatever arrived within BATCH_TIMEOUT of the first one, and route them in
+# a single transaction
+BATCH_SIZE = int(os.getenv("ROUTING_BATCH_SIZE", "32"))
+BATCH_TIMEOUT = float(os.getenv("ROUTING_BATCH_TIMEOUT_MS", "10")) / 1000.0
+
+setup_queue_logging()
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Document Routing Engine", default_response_class=ORJSONResponse)
 
 # Initialize document router
 document_router = DocumentRouter()
 
+def consume_routing_batches():
+    """Drain classification results in micro-batches and route each batch"""
+    mq.connect()
+    channel = mq.channel
+
+    while True:
+        batch = []
+        last_tag = None
+        deadline = None
+
+        while len(batch) < BATCH_SIZE:
+            method, _properties, body = channel.basic_get("classification_results")
+            if method is None:
+                if not batch:
+                    # Idle: nothing in flight, poll lazily
+                    time.sleep(0.05)
+                    continue
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(0.002)
+                continue
+            batch.append(orjson.loads(body))
+            last_tag = method.delivery_tag
+            if deadline is None:
+                deadline = time.monotonic() + BATCH_TIMEOUT
+
+        try:
+            process_routing_batch(batch)
+        except Exception:
+            logger.exception("Error processing routing batch")
+        # Single cumulative ack for the whole batch (same at-most-once
+        # semantics as the previous auto-ack consumer)
+        channel.basic_ack(delivery_tag=last_tag, multiple=True)
+
 @app.on_event("startup")
 async def startup_event():
     """Start message queue consumer"""
     def start_consumer():
         try:
-            mq.connect()
-            mq.consume_messages("classification_results", process_routing_message)
-        except Exception as e:
-            print(f"Error starting routing consumer: {e}")
-    
+            consume_routing_batches()
+        except Exception:
+            logger.exception("Error starting routing consumer")
+
     # Start consumer in background thread
     consumer_thread = threading.Thread(target=start_consumer, daemon=True)
     consumer_thread.start()
@@ -35,71 +82,87 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "routing_engine"}
 
-def process_routing_message(ch, method, properties, body):
-    """Process classification results and route documents"""
+@app.post("/rules/refresh")
+async def refresh_rules():
+    """Drop the in-memory rule cache after routing rules change"""
+    document_router.invalidate_rules()
+    return {"status": "rules cache invalidated"}
+
+def process_routing_batch(messages):
+    """Route a batch of classification results in one transaction"""
+    # Thread-scoped: the consumer thread reuses one Session across batches
+    db = ScopedSession()
+
     try:
-        message = json.loads(body)
-        document_id = message["document_id"]
-        doc_type = message["doc_type"]
-        confidence = message["confidence"]
-        entities = message.get("entities", {})
-        risk_score = message.get("risk_score", 0.0)
-        priority = message.get("priority", 1)
-        
-        print(f"Routing document {document_id} of type {doc_type}")
-        
-        # Get database session
-        db = get_db_session()
-        
-        try:
-            # Get document
-            document = db.query(Document).filter(Document.id == document_id).first()
-            if not document:
-                print(f"Document {document_id} not found")
-                return
-            
-            # Route document
-            routing_result = document_router.route_document(
-                document_id=document_id,
-                doc_type=doc_type,
-                confidence=confidence,
-                entities=entities,
-                risk_score=risk_score,
-                priority=priority,
-                db=db
-            )
-            
-            if routing_result:
-                # Update document status
-                document.status = 'routed'
-                db.commit()
-                
-                # Send notification
-                notification_message = {
-                    "document_id": document_id,
-                    "assignment_id": routing_result["assignment_id"],
-                    "assigned_to": routing_result["assigned_to"],
-                    "doc_type": doc_type,
-                    "priority": priority,
-                    "routing_reason": routing_result["routing_reason"]
-                }
-                
-                try:
-                    mq.publish_message("notifications", notification_message)
-                except Exception as e:
-                    print(f"Warning: Could not send notification: {e}")
-                
-                print(f"Document {document_id} routed to {routing_result['assigned_to']}")
+        # Prefetch every document in the batch in one round trip
+        ids = [message["document_id"] for message in messages]
+        documents = {
+            str(document.id): document
+            for document in db.query(Document).filter(Document.id.in_(ids)).all()
+        }
+
+        known = []
+        for message in messages:
+            if str(message["document_id"]) in documents:
+                known.append(message)
             else:
-                print(f"Failed to route document {document_id}")
-                
+                logger.warning("Document %s not found", message["document_id"])
+
+        results = document_router.route_document_batch(known, db)
+
+        for message, result in results:
+            if result:
+                documents[str(message["document_id"])].status = 'routed'
+
+        db.commit()
+
+        for message, result in results:
+            document_id = message["document_id"]
+            if not result:
+                logger.warning("Failed to route document %s", document_id)
+                continue
+
+            # Send notification
+            notification_message = {
+                "document_id": document_id,
+                "assignment_id": result["assignment_id"],
+                "assigned_to": result["assigned_to"],
+                "doc_type": message["doc_type"],
+                "priority": result["priority"],
+                "routing_reason": result["routing_reason"]
+            }
+
+            try:
+                mq.publish_message("notifications", notification_message)
+            except Exception as e:
+                logger.warning("Could not send notification: %s", e)
+
+            # Per-document success is DEBUG; at full throughput this line
+            # alone would dominate the log volume
+            logger.debug("Document %s routed to %s", document_id, result["assigned_to"])
+
+        # Drain the notification buffer with the batch
+        try:
+            mq.flush()
         except Exception as e:
-            print(f"Error routing document {document_id}: {e}")
-        finally:
-            db.close()
-            
-    except Exception as e:
-        print(f"Error processing routing message: {e}")
+            logger.warning("Could not flush notifications: %s", e)
+
+    except Exception:
+        logger.exception("Error routing batch")
+        db.rollback()
+    finally:
+        db.close()
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    # uvloop + httptools are the C event loop / parser uvicorn[standard]
+    # ships; workers fork from the import string (each worker runs its own
+    # batch consumer, competing on the queue)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8002,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "4")),
+        backlog=4096
+    )
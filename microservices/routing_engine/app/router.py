@@ -1,17 +1,113 @@
 
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from typing import Dict, Any, Optional, List
 from libs.database.models import RoutingRule, User, DocumentAssignment
-import json
-from datetime import datetime, timedelta
+from libs.utils.rules import RoutingContext, compile_rule, lower_context
+import logging
+import numpy as np
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# Routing constants, lifted to module scope so the hot path never rebuilds
+# them per call
+
+# Default routing mappings
+_DEFAULT_ASSIGNEES = MappingProxyType({
+    "contract": "legal-team",
+    "invoice": "finance-team",
+    "legal": "legal-team",
+    "financial": "finance-team",
+    "hr": "hr-team",
+    "technical": "engineering-team",
+    "report": "management-team",
+    "correspondence": "admin-team"
+})
+
+# Base due dates in seconds, indexed by priority 1-5 (5 is most urgent);
+# kept as integers so the due-date math below is pure int arithmetic
+_PRIORITY_SECONDS = (168 * 3600, 168 * 3600, 72 * 3600, 24 * 3600, 8 * 3600, 2 * 3600)
+
+# Document type modifiers as Q8 fixed point (multiplier * 256); applying one
+# is an integer multiply and shift instead of float math
+_TYPE_MOD_Q8 = MappingProxyType({
+    "legal": 128,          # 0.5 — legal docs need faster processing
+    "contract": 128,       # 0.5 — contracts are time-sensitive
+    "invoice": 179,        # 0.7 — invoices have payment deadlines
+    "financial": 205,      # 0.8 — financial docs are important
+    "hr": 256,             # 1.0 — normal processing
+    "technical": 307,      # 1.2 — technical docs can take longer
+    "report": 384,         # 1.5 — reports are less urgent
+    "correspondence": 256  # 1.0
+})
+
+DefaultRule = namedtuple("DefaultRule", "name assignee team priority")
+
+@lru_cache(maxsize=32)
+def _default_rule(doc_type: str) -> DefaultRule:
+    """Fallback rule for a document type; one instance per type"""
+    assignee = _DEFAULT_ASSIGNEES.get(doc_type, "admin-team")
+    return DefaultRule(f"Default rule for {doc_type}", assignee, assignee, 1)
 
 class DocumentRouter:
+    # Rules change rarely; serve them from memory for this long before
+    # re-reading from Postgres
+    RULES_CACHE_TTL = 30.0
+    # Bursts tend to hit the same rule and doc type back to back; remember
+    # the picked assignee this long before re-scoring candidates
+    ASSIGNEE_CACHE_TTL = 1.0
+    ASSIGNEE_CACHE_MAX = 256
+
     def __init__(self):
-        self.rule_cache = {}
         self.user_cache = {}
-        
+        self._rules_cache = ()
+        self._rules_cache_ts = 0.0
+        # The consumer runs in a background thread next to the API handlers
+        self._rules_lock = threading.RLock()
+        # (rule key, doc_type) -> (assignee, remaining headroom, timestamp)
+        self._assignee_cache = {}
+        self._assignee_lock = threading.RLock()
+
+    def _get_rules(self, db: Session) -> tuple:
+        """Return (rule, predicate) pairs ordered by priority, cached with a TTL
+
+        Each rule's JSONB condition is compiled into a predicate closure
+        once at cache fill, so per-document evaluation is a plain callable
+        instead of re-interpreting the condition dict.
+        """
+        now = time.monotonic()
+        with self._rules_lock:
+            if self._rules_cache_ts and now - self._rules_cache_ts < self.RULES_CACHE_TTL:
+                return self._rules_cache
+
+        rules = db.query(RoutingRule).filter(RoutingRule.is_active == True).order_by(RoutingRule.priority.desc()).all()
+        # Detach so the cached objects outlive this session
+        for rule in rules:
+            db.expunge(rule)
+        compiled = tuple((rule, compile_rule(rule.condition)) for rule in rules)
+
+        with self._rules_lock:
+            self._rules_cache = compiled
+            self._rules_cache_ts = now
+        return self._rules_cache
+
+    def invalidate_rules(self):
+        """Drop the cached rules so the next routing call re-reads them"""
+        with self._rules_lock:
+            self._rules_cache = ()
+            self._rules_cache_ts = 0.0
+        with self._assignee_lock:
+            self._assignee_cache.clear()
+
+
     def route_document(
-        self, 
+        self,
         document_id: str,
         doc_type: str,
         confidence: float,
@@ -21,179 +117,145 @@ class DocumentRouter:
         db: Session
     ) -> Optional[Dict[str, Any]]:
         """Route document based on rules and context"""
-        
-        # Get active routing rules
-        rules = db.query(RoutingRule).filter(RoutingRule.is_active == True).order_by(RoutingRule.priority.desc()).all()
-        
-        # Document context for rule evaluation
-        context = {
+        message = {
+            "document_id": document_id,
             "doc_type": doc_type,
             "confidence": confidence,
             "entities": entities,
             "risk_score": risk_score,
-            "priority": priority,
-            "persons": entities.get("persons", []),
-            "organizations": entities.get("organizations", []),
-            "amounts": entities.get("money", []),
-            "dates": entities.get("dates", [])
+            "priority": priority
         }
-        
-        # Find matching rule
-        matched_rule = None
-        for rule in rules:
-            if self._evaluate_rule_condition(rule.condition, context):
-                matched_rule = rule
-                break
-        
-        if not matched_rule:
-            # Use default routing based on document type
-            matched_rule = self._get_default_routing_rule(doc_type, db)
-        
-        if not matched_rule:
-            print(f"No routing rule found for document {document_id}")
-            return None
-        
-        # Find best assignee
-        assignee = self._find_best_assignee(matched_rule, context, db)
-        
-        if not assignee:
-            print(f"No available assignee found for document {document_id}")
-            return None
-        
-        # Create assignment
-        assignment = DocumentAssignment(
-            doc_id=document_id,
-            user_id=assignee["user_id"],
-            assigned_by="routing_engine",
-            status="assigned",
-            priority=priority,
-            due_date=self._calculate_due_date(priority, doc_type)
-        )
-        
-        db.add(assignment)
+        result = self.route_document_batch([message], db)[0][1]
         db.commit()
-        db.refresh(assignment)
-        
-        return {
-            "assignment_id": assignment.id,
-            "assigned_to": assignee["username"],
-            "user_id": assignee["user_id"],
-            "routing_reason": f"Matched rule: {matched_rule.name}",
-            "priority": priority,
-            "due_date": assignment.due_date
-        }
-    
-    def _evaluate_rule_condition(self, condition: Dict[str, Any], context: Dict[str, Any]) -> bool:
-        """Evaluate if rule condition matches document context"""
-        try:
-            # Simple condition evaluation
-            for key, expected_value in condition.items():
-                if key not in context:
-                    continue
-                
-                context_value = context[key]
-                
-                if isinstance(expected_value, str):
-                    # String matching (case insensitive)
-                    if isinstance(context_value, str):
-                        if expected_value.lower() not in context_value.lower():
-                            return False
-                    elif isinstance(context_value, list):
-                        # Check if any item in list matches
-                        found = False
-                        for item in context_value:
-                            if isinstance(item, str) and expected_value.lower() in item.lower():
-                                found = True
-                                break
-                        if not found:
-                            return False
-                    else:
-                        return False
-                
-                elif isinstance(expected_value, (int, float)):
-                    # Numeric comparison
-                    if isinstance(context_value, (int, float)):
-                        if context_value != expected_value:
-                            return False
-                    else:
-                        return False
-                
-                elif isinstance(expected_value, dict):
-                    # Advanced conditions (greater than, less than, etc.)
-                    if "gt" in expected_value:
-                        if not (isinstance(context_value, (int, float)) and context_value > expected_value["gt"]):
-                            return False
-                    if "lt" in expected_value:
-                        if not (isinstance(context_value, (int, float)) and context_value < expected_value["lt"]):
-                            return False
-                    if "gte" in expected_value:
-                        if not (isinstance(context_value, (int, float)) and context_value >= expected_value["gte"]):
-                            return False
-                    if "lte" in expected_value:
-                        if not (isinstance(context_value, (int, float)) and context_value <= expected_value["lte"]):
-                            return False
-                    if "contains" in expected_value:
-                        if isinstance(context_value, str):
-                            if expected_value["contains"].lower() not in context_value.lower():
-                                return False
-                        elif isinstance(context_value, list):
-                            found = False
-                            for item in context_value:
-                                if isinstance(item, str) and expected_value["contains"].lower() in item.lower():
-                                    found = True
-                                    break
-                            if not found:
-                                return False
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error evaluating rule condition: {e}")
-            return False
+        return result
+
+    def route_document_batch(self, messages: List[Dict[str, Any]], db: Session) -> List[tuple]:
+        """Route a batch of classification results inside one transaction
+
+        Returns (message, routing_result) pairs in input order. The rule
+        query runs once for the whole batch, assignments are flushed
+        together so ids are populated, and the caller owns the commit — one
+        fsync per batch instead of one per document.
+        """
+        # Get active routing rules (cached between batches)
+        rules = self._get_rules(db)
+
+        routed = []
+        rows = []
+        for message in messages:
+            doc_type = message["doc_type"]
+            entities = message.get("entities", {})
+            priority = message.get("priority", 1)
+
+            # Document context for rule evaluation; a slotted dataclass so
+            # every predicate field access is an attribute read, not a dict
+            # probe
+            context = RoutingContext(
+                doc_type=doc_type,
+                confidence=message["confidence"],
+                entities=entities,
+                risk_score=message.get("risk_score", 0.0),
+                priority=priority,
+                persons=tuple(entities.get("persons", ())),
+                organizations=tuple(entities.get("organizations", ())),
+                amounts=tuple(entities.get("money", ())),
+                dates=tuple(entities.get("dates", ()))
+            )
+
+            # Find matching rule; string fields are lowered once here rather
+            # than per rule inside the predicates
+            eval_context = lower_context(context)
+            matched_rule = None
+            for rule, predicate in rules:
+                if predicate(eval_context):
+                    matched_rule = rule
+                    break
+
+            if not matched_rule:
+                # Use default routing based on document type
+                matched_rule = self._get_default_routing_rule(doc_type, db)
+
+            if not matched_rule:
+                logger.warning("No routing rule found for document %s", message["document_id"])
+                routed.append((message, None))
+                continue
+
+            # Find best assignee
+            assignee = self._find_best_assignee(matched_rule, context, db)
+
+            if not assignee:
+                logger.warning("No available assignee found for document %s", message["document_id"])
+                routed.append((message, None))
+                continue
+
+            # Create assignment as a plain row dict; the whole batch goes to
+            # Postgres in one INSERT ... RETURNING below
+            due_date = self._calculate_due_date(priority, doc_type)
+            rows.append({
+                "doc_id": message["document_id"],
+                "user_id": assignee["user_id"],
+                "assigned_by": "routing_engine",
+                "status": "assigned",
+                "priority": priority,
+                "due_date": due_date
+            })
+
+            routed.append((message, {
+                "assigned_to": assignee["username"],
+                "user_id": assignee["user_id"],
+                "routing_reason": f"Matched rule: {matched_rule.name}",
+                "priority": priority,
+                "due_date": due_date
+            }))
+
+        # One bulk insert returns every generated id without ORM flush or
+        # per-row refresh SELECTs
+        if rows:
+            inserted_ids = db.execute(
+                insert(DocumentAssignment).returning(
+                    DocumentAssignment.id, sort_by_parameter_order=True
+                ),
+                rows
+            ).scalars().all()
+            id_iter = iter(inserted_ids)
+            for _message, result in routed:
+                if result:
+                    result["assignment_id"] = next(id_iter)
+        return routed
     
-    def _get_default_routing_rule(self, doc_type: str, db: Session) -> Optional[RoutingRule]:
+    def _get_default_routing_rule(self, doc_type: str, db: Session) -> Optional[DefaultRule]:
         """Get default routing rule for document type"""
-        
-        # Default routing mappings
-        default_mappings = {
-            "contract": "legal-team",
-            "invoice": "finance-team",
-            "legal": "legal-team",
-            "financial": "finance-team",
-            "hr": "hr-team",
-            "technical": "engineering-team",
-            "report": "management-team",
-            "correspondence": "admin-team"
-        }
-        
-        assignee = default_mappings.get(doc_type, "admin-team")
-        
-        # Create a temporary rule object
-        class DefaultRule:
-            def __init__(self, assignee):
-                self.name = f"Default rule for {doc_type}"
-                self.assignee = assignee
-                self.team = assignee
-                self.priority = 1
-        
-        return DefaultRule(assignee)
+        return _default_rule(doc_type)
     
-    def _find_best_assignee(self, rule: RoutingRule, context: Dict[str, Any], db: Session) -> Optional[Dict[str, Any]]:
-        """Find the best available assignee for the rule"""
-        
-        # Get available users
-        available_users = db.query(User).filter(User.is_active == True).all()
-        
-        if not available_users:
-            return None
-        
+    def _find_best_assignee(self, rule: RoutingRule, context: RoutingContext, db: Session) -> Optional[Dict[str, Any]]:
+        """Find the best available assignee for the rule
+
+        The pick is memoized per (rule, doc_type) for a short window: each
+        cache hit consumes one unit of the picked user's remaining headroom,
+        so a burst cannot silently pile assignments past their capacity
+        before the next re-score.
+        """
+        cache_key = (getattr(rule, "id", None) or rule.name, context.doc_type)
+        now = time.monotonic()
+        with self._assignee_lock:
+            cached = self._assignee_cache.get(cache_key)
+            if cached:
+                assignee, headroom, ts = cached
+                if now - ts < self.ASSIGNEE_CACHE_TTL and headroom > 0:
+                    self._assignee_cache[cache_key] = (assignee, headroom - 1, ts)
+                    return dict(assignee)
+                del self._assignee_cache[cache_key]
+
         # Filter by role/department if specified in rule
         candidate_users = []
-        
+
         if hasattr(rule, 'assignee') and rule.assignee:
             # Check if assignee is a specific user
-            user = db.query(User).filter(User.username == rule.assignee).first()
-            if user and user.is_active:
+            user = db.query(User).filter(
+                User.username == rule.assignee,
+                User.is_active == True
+            ).first()
+            if user:
                 candidate_users = [user]
             else:
                 # Check if assignee is a team/department
@@ -201,124 +263,142 @@ class DocumentRouter:
                     User.department == rule.assignee.replace('-team', ''),
                     User.is_active == True
                 ).all()
-        
+
         if hasattr(rule, 'team') and rule.team and not candidate_users:
             # Filter by team
             candidate_users = db.query(User).filter(
                 User.department == rule.team.replace('-team', ''),
                 User.is_active == True
             ).all()
-        
+
         if not candidate_users:
-            candidate_users = available_users
-        
+            # Fall back to anyone active; only fetched when actually needed
+            candidate_users = db.query(User).filter(User.is_active == True).all()
+
+        if not candidate_users:
+            return None
+
+        # One grouped count for all candidates instead of a COUNT query per
+        # user; rides the (user_id, status) index on document_assignments
+        candidate_ids = [user.id for user in candidate_users]
+        active_counts = dict(
+            db.query(DocumentAssignment.user_id, func.count(DocumentAssignment.id))
+            .filter(
+                DocumentAssignment.user_id.in_(candidate_ids),
+                DocumentAssignment.status.in_(['assigned', 'in_progress'])
+            )
+            .group_by(DocumentAssignment.user_id)
+            .all()
+        )
+
         # Find user with lowest current workload
         best_user = None
         lowest_workload = float('inf')
-        
-        for user in candidate_users:
-            # Count active assignments
-            active_assignments = db.query(DocumentAssignment).filter(
-                DocumentAssignment.user_id == user.id,
-                DocumentAssignment.status.in_(['assigned', 'in_progress'])
-            ).count()
-            
-            # Consider user capacity
-            workload_ratio = active_assignments / max(user.workload_capacity, 1)
-            
-            # Adjust for skills match
-            skills_bonus = 0
-            if user.skills and context.get("doc_type"):
-                user_skills = user.skills if isinstance(user.skills, list) else []
-                if context["doc_type"] in user_skills:
-                    skills_bonus = -0.2  # Reduce effective workload for skill match
-            
-            effective_workload = workload_ratio + skills_bonus
-            
-            if effective_workload < lowest_workload:
-                lowest_workload = effective_workload
-                best_user = user
+        doc_type = context.doc_type
+
+        if len(candidate_users) >= 16:
+            # Large pools (whole-department fallbacks): score every candidate
+            # in three array ops instead of a Python fold
+            caps = np.fromiter(
+                (max(user.workload_capacity, 1) for user in candidate_users),
+                dtype=np.float32, count=len(candidate_users)
+            )
+            active = np.fromiter(
+                (active_counts.get(user.id, 0) for user in candidate_users),
+                dtype=np.float32, count=len(candidate_users)
+            )
+            skilled = np.fromiter(
+                (bool(doc_type) and isinstance(user.skills, list) and doc_type in user.skills
+                 for user in candidate_users),
+                dtype=bool, count=len(candidate_users)
+            )
+            scores = active / caps + np.where(skilled, np.float32(-0.2), np.float32(0.0))
+            best_idx = int(scores.argmin())
+            best_user = candidate_users[best_idx]
+            lowest_workload = float(scores[best_idx])
+        else:
+            for user in candidate_users:
+                # Consider user capacity
+                workload_ratio = active_counts.get(user.id, 0) / max(user.workload_capacity, 1)
+
+                # Adjust for skills match
+                skills_bonus = 0
+                if user.skills and doc_type:
+                    user_skills = user.skills if isinstance(user.skills, list) else []
+                    if doc_type in user_skills:
+                        skills_bonus = -0.2  # Reduce effective workload for skill match
+
+                effective_workload = workload_ratio + skills_bonus
+
+                if effective_workload < lowest_workload:
+                    lowest_workload = effective_workload
+                    best_user = user
         
         if best_user:
-            return {
+            result = {
                 "user_id": best_user.id,
                 "username": best_user.username,
                 "current_workload": lowest_workload
             }
-        
+            # Cache hits may hand out this many more assignments before the
+            # user would cross ~90% of capacity and a re-score is forced
+            headroom = int(max(best_user.workload_capacity, 1) * 0.9) - active_counts.get(best_user.id, 0)
+            if headroom > 0:
+                with self._assignee_lock:
+                    if len(self._assignee_cache) >= self.ASSIGNEE_CACHE_MAX:
+                        self._assignee_cache.clear()
+                    self._assignee_cache[cache_key] = (result, headroom, now)
+            return result
+
         return None
     
     def _calculate_due_date(self, priority: int, doc_type: str) -> datetime:
-        """Calculate due date based on priority and document type"""
-        
-        # Base due dates in hours
-        priority_hours = {
-            5: 2,   # Urgent: 2 hours
-            4: 8,   # High: 8 hours
-            3: 24,  # Medium: 1 day
-            2: 72,  # Low: 3 days
-            1: 168  # Very low: 1 week
-        }
-        
-        # Document type modifiers
-        type_modifiers = {
-            "legal": 0.5,      # Legal docs need faster processing
-            "contract": 0.5,   # Contracts are time-sensitive
-            "invoice": 0.7,    # Invoices have payment deadlines
-            "financial": 0.8,  # Financial docs are important
-            "hr": 1.0,         # Normal processing
-            "technical": 1.2,  # Technical docs can take longer
-            "report": 1.5,     # Reports are less urgent
-            "correspondence": 1.0
-        }
-        
-        base_hours = priority_hours.get(priority, 72)
-        modifier = type_modifiers.get(doc_type, 1.0)
-        
-        due_hours = base_hours * modifier
-        due_date = datetime.utcnow() + timedelta(hours=due_hours)
-        
-        return due_date
+        """Calculate due date based on priority and document type
+
+        Integer seconds plus a Q8 fixed-point modifier: one epoch read, one
+        multiply, one shift, one datetime constructed — instead of two
+        datetimes, a timedelta and float math per assignment (and utcnow()
+        is deprecated anyway).
+        """
+        due_ts = int(time.time()) + (
+            _PRIORITY_SECONDS[min(max(priority, 1), 5)] * _TYPE_MOD_Q8.get(doc_type, 256) >> 8
+        )
+        return datetime.fromtimestamp(due_ts, tz=timezone.utc)
     
     def get_routing_statistics(self, db: Session) -> Dict[str, Any]:
         """Get routing performance statistics"""
-        
-        # Total assignments
-        total_assignments = db.query(DocumentAssignment).count()
-        
-        # Assignments by status
-        status_counts = {}
-        statuses = ['assigned', 'in_progress', 'completed', 'overdue']
-        for status in statuses:
-            count = db.query(DocumentAssignment).filter(DocumentAssignment.status == status).count()
-            status_counts[status] = count
-        
-        # Average assignment time (for completed assignments)
-        completed_assignments = db.query(DocumentAssignment).filter(
-            DocumentAssignment.status == 'completed',
-            DocumentAssignment.completed_at.isnot(None)
-        ).all()
-        
-        total_time = 0
-        if completed_assignments:
-            for assignment in completed_assignments:
-                time_diff = assignment.completed_at - assignment.created_at
-                total_time += time_diff.total_seconds()
-            
-            avg_completion_time = total_time / len(completed_assignments) / 3600  # Hours
-        else:
-            avg_completion_time = 0
-        
+
+        # All counters and the average completion time come back in a single
+        # aggregate row (FILTER clauses), instead of six sequential queries —
+        # one of which hydrated every completed assignment just to average a
+        # timestamp difference in Python
+        statuses = ('assigned', 'in_progress', 'completed', 'overdue')
+        stats = db.query(
+            func.count().label("total"),
+            *[
+                func.count().filter(DocumentAssignment.status == status).label(status)
+                for status in statuses
+            ],
+            func.avg(
+                func.extract('epoch', DocumentAssignment.completed_at - DocumentAssignment.created_at)
+            ).filter(
+                DocumentAssignment.status == 'completed',
+                DocumentAssignment.completed_at.isnot(None)
+            ).label("avg_completion_seconds")
+        ).select_from(DocumentAssignment).one()
+
+        avg_completion_time = (stats.avg_completion_seconds or 0) / 3600  # Hours
+
         # User workload distribution
-        user_workloads = db.query(User.username, db.func.count(DocumentAssignment.id).label('active_count')).outerjoin(
+        user_workloads = db.query(User.username, func.count(DocumentAssignment.id).label('active_count')).outerjoin(
             DocumentAssignment,
-            (DocumentAssignment.user_id == User.id) & 
+            (DocumentAssignment.user_id == User.id) &
             (DocumentAssignment.status.in_(['assigned', 'in_progress']))
         ).group_by(User.id, User.username).all()
-        
+
         return {
-            "total_assignments": total_assignments,
-            "status_distribution": status_counts,
+            "total_assignments": stats.total,
+            "status_distribution": {status: getattr(stats, status) for status in statuses},
             "avg_completion_time_hours": round(avg_completion_time, 2),
             "user_workloads": [
                 {"username": username, "active_assignments": count}
@@ -1,34 +1,79 @@
 
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime
 import uvicorn
-import threading
-import json
+import asyncio
+import aio_pika
+import logging
+import orjson
+import os
 from typing import List, Optional
-from libs.database.connection import get_db, get_db_session
+from pydantic import TypeAdapter
+from libs.database.connection import get_db, ScopedSession
 from libs.database.models import ScrapingSource, ScrapedContent
+from libs.utils.logging import setup_queue_logging
 from libs.utils.messaging import mq
 from .scraper import WebScraper
-from .schemas import ScrapingSourceCreate, ScrapingSourceResponse, ScrapedContentResponse
+from .schemas import ScrapingSourceCreate, ScrapingSourceResponse
 
-app = FastAPI(title="Web Scraper Service")
+# One validator call per list response instead of a model construction per
+# row; the model validates straight off ORM attributes
+_SOURCE_LIST_ADAPTER = TypeAdapter(List[ScrapingSourceResponse])
+
+# Scrapes in flight at once; each one spends most of its time waiting on
+# the remote site, so they overlap well
+PREFETCH_COUNT = 64
+MAX_CONCURRENT_SCRAPES = 32
+
+setup_queue_logging()
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Web Scraper Service", default_response_class=ORJSONResponse)
 
 # Initialize web scraper
 web_scraper = WebScraper()
 
-@app.on_event("startup")
-async def startup_event():
-    """Start message queue consumer for scraping tasks"""
-    def start_consumer():
+_scrape_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+
+async def handle_scraping_message(message: aio_pika.abc.AbstractIncomingMessage):
+    """Ack-on-success wrapper around the blocking scraping body"""
+    async with message.process():
         try:
-            mq.connect()
-            mq.consume_messages("web_scraping", process_scraping_message)
+            payload = orjson.loads(message.body)
         except Exception as e:
-            print(f"Error starting scraper consumer: {e}")
-    
-    # Start consumer in background thread
-    consumer_thread = threading.Thread(target=start_consumer, daemon=True)
-    consumer_thread.start()
+            logger.error("Error decoding scraping message: %s", e)
+            return
+        # The scrape itself is blocking I/O; run it on the thread pool so
+        # many tasks overlap, bounded by the semaphore
+        async with _scrape_semaphore:
+            await asyncio.to_thread(process_scraping_task, payload)
+
+async def consume_scraping_tasks():
+    """Connect to RabbitMQ and consume the scraping queue asynchronously"""
+    connection = await aio_pika.connect_robust(
+        host=os.getenv("RABBITMQ_HOST", "localhost"),
+        port=int(os.getenv("RABBITMQ_PORT", "5672")),
+        login=os.getenv("RABBITMQ_USER", "admin"),
+        password=os.getenv("RABBITMQ_PASSWORD", "secret"),
+    )
+    channel = await connection.channel()
+    await channel.set_qos(prefetch_count=PREFETCH_COUNT)
+    queue = await channel.declare_queue("web_scraping", durable=True)
+    await queue.consume(handle_scraping_message)
+
+@app.on_event("startup")
+async def startup_event():
+    """Start the task publisher and message consumer"""
+    try:
+        mq.connect()
+    except Exception as e:
+        logger.warning("Could not connect task publisher: %s", e)
+
+    asyncio.create_task(consume_scraping_tasks())
 
 @app.get("/")
 async def root():
@@ -38,9 +83,22 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "web_scraper"}
 
-@app.post("/sources", response_model=ScrapingSourceResponse)
+def _publish_scrape_task(source_id: int, url: str, rules):
+    """Publish a scraping task; runs after the response has been sent"""
+    scraping_task = {
+        "source_id": source_id,
+        "url": url,
+        "rules": rules
+    }
+    try:
+        mq.publish_message("web_scraping", scraping_task)
+    except Exception as e:
+        logger.warning("Could not send scraping task to queue: %s", e)
+
+@app.post("/sources", response_model=ScrapingSourceResponse, status_code=202)
 async def create_scraping_source(
     source_data: ScrapingSourceCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Create a new web scraping source"""
@@ -48,20 +106,12 @@ async def create_scraping_source(
     db.add(source)
     db.commit()
     db.refresh(source)
-    
-    # Send scraping task to queue
-    scraping_task = {
-        "source_id": source.id,
-        "url": source.url,
-        "rules": source.scraping_rules
-    }
-    
-    try:
-        mq.publish_message("web_scraping", scraping_task)
-    except Exception as e:
-        print(f"Warning: Could not send scraping task to queue: {e}")
-    
-    return ScrapingSourceResponse.from_orm(source)
+
+    # Queue the scraping task after the response goes out; the client does
+    # not wait on the broker
+    background_tasks.add_task(_publish_scrape_task, source.id, source.url, source.scraping_rules)
+
+    return ScrapingSourceResponse.model_validate(source)
 
 @app.get("/sources", response_model=List[ScrapingSourceResponse])
 async def get_scraping_sources(
@@ -77,7 +127,7 @@ async def get_scraping_sources(
         query = query.filter(ScrapingSource.is_active == is_active)
     
     sources = query.offset(skip).limit(limit).all()
-    return [ScrapingSourceResponse.from_orm(source) for source in sources]
+    return _SOURCE_LIST_ADAPTER.validate_python(sources)
 
 @app.get("/sources/{source_id}", response_model=ScrapingSourceResponse)
 async def get_scraping_source(source_id: int, db: Session = Depends(get_db)):
@@ -85,9 +135,9 @@ async def get_scraping_source(source_id: int, db: Session = Depends(get_db)):
     source = db.query(ScrapingSource).filter(ScrapingSource.id == source_id).first()
     if not source:
         raise HTTPException(status_code=404, detail="Scraping source not found")
-    return ScrapingSourceResponse.from_orm(source)
+    return ScrapingSourceResponse.model_validate(source)
 
-@app.post("/sources/{source_id}/scrape")
+@app.post("/sources/{source_id}/scrape", status_code=202)
 async def trigger_scraping(
     source_id: int,
     background_tasks: BackgroundTasks,
@@ -97,35 +147,69 @@ async def trigger_scraping(
     source = db.query(ScrapingSource).filter(ScrapingSource.id == source_id).first()
     if not source:
         raise HTTPException(status_code=404, detail="Scraping source not found")
-    
-    # Send scraping task to queue
-    scraping_task = {
-        "source_id": source.id,
-        "url": source.url,
-        "rules": source.scraping_rules
-    }
-    
-    try:
-        mq.publish_message("web_scraping", scraping_task)
-        return {"message": "Scraping task queued successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to queue scraping task: {e}")
 
-@app.get("/content", response_model=List[ScrapedContentResponse])
+    # Queue the scraping task after the response goes out
+    background_tasks.add_task(_publish_scrape_task, source.id, source.url, source.scraping_rules)
+
+    return {"message": "Scraping task queued successfully"}
+
+def _stream_content_rows(rows):
+    """Encode result rows to NDJSON one at a time"""
+    for row in rows:
+        yield orjson.dumps({
+            "id": row.id,
+            "source_id": row.source_id,
+            "url": row.url,
+            "title": row.title,
+            "content_hash": row.content_hash,
+            "metadata": row.meta,
+            "scraped_at": row.scraped_at
+        }) + b"\n"
+
+@app.get("/content")
 async def get_scraped_content(
-    skip: int = 0,
     limit: int = 100,
     source_id: Optional[int] = None,
+    before_scraped_at: Optional[datetime] = None,
+    before_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Get scraped content"""
-    query = db.query(ScrapedContent)
-    
+    """Get scraped content as NDJSON, newest first
+
+    Pagination is keyset-based: pass the last row's scraped_at/id back as
+    before_scraped_at/before_id to fetch the next page. Unlike offset
+    paging, deep pages stay an index range scan instead of walking and
+    discarding every earlier row. Rows are encoded and flushed one at a
+    time, so large limits never buffer the whole page in memory.
+    """
+    # Project only the columns the response carries; the multi-MB content
+    # text and its search vector never leave Postgres
+    query = db.query(
+        ScrapedContent.id,
+        ScrapedContent.source_id,
+        ScrapedContent.url,
+        ScrapedContent.title,
+        ScrapedContent.content_hash,
+        ScrapedContent.meta,
+        ScrapedContent.scraped_at
+    )
+
     if source_id:
         query = query.filter(ScrapedContent.source_id == source_id)
-    
-    content = query.offset(skip).limit(limit).all()
-    return [ScrapedContentResponse.from_orm(item) for item in content]
+
+    if before_scraped_at is not None and before_id is not None:
+        query = query.filter(
+            tuple_(ScrapedContent.scraped_at, ScrapedContent.id) < (before_scraped_at, before_id)
+        )
+
+    query = query.order_by(
+        ScrapedContent.scraped_at.desc(), ScrapedContent.id.desc()
+    ).limit(limit)
+
+    return StreamingResponse(
+        _stream_content_rows(query.yield_per(200)),
+        media_type="application/x-ndjson"
+    )
 
 @app.get("/content/search")
 async def search_scraped_content(
@@ -134,92 +218,128 @@ async def search_scraped_content(
     db: Session = Depends(get_db)
 ):
     """Search scraped content"""
-    content = db.query(ScrapedContent).filter(
-        (ScrapedContent.title.ilike(f"%{query}%")) |
-        (ScrapedContent.content.ilike(f"%{query}%"))
+    # Full-text search on the generated tsvector rides the GIN index; the
+    # old double ILIKE forced a sequential scan over every content blob
+    ts_query = func.websearch_to_tsquery('english', query)
+    rows = db.query(
+        ScrapedContent.id,
+        ScrapedContent.source_id,
+        ScrapedContent.url,
+        ScrapedContent.title,
+        func.ts_headline('english', ScrapedContent.content, ts_query).label('preview'),
+        ScrapedContent.scraped_at
+    ).filter(
+        ScrapedContent.search_tsv.op('@@')(ts_query)
+    ).order_by(
+        func.ts_rank(ScrapedContent.search_tsv, ts_query).desc()
     ).limit(limit).all()
-    
-    results = []
-    for item in content:
-        results.append({
-            "id": item.id,
-            "source_id": item.source_id,
-            "url": item.url,
-            "title": item.title,
-            "content_preview": item.content[:200] if item.content else "",
-            "scraped_at": item.scraped_at
-        })
-    
+
+    results = [
+        {
+            "id": row.id,
+            "source_id": row.source_id,
+            "url": row.url,
+            "title": row.title,
+            "content_preview": row.preview or "",
+            "scraped_at": row.scraped_at
+        }
+        for row in rows
+    ]
+
     return {
         "query": query,
         "total_results": len(results),
         "results": results
     }
 
-def process_scraping_message(ch, method, properties, body):
+def process_scraping_task(message: dict):
     """Process web scraping tasks from message queue"""
+    source_id = message["source_id"]
+    url = message["url"]
+    rules = message.get("rules", {})
+
+    logger.debug("Starting scraping for source %s: %s", source_id, url)
+
+    # Thread-scoped: each thread-pool worker reuses one Session across tasks
+    db = ScopedSession()
+
     try:
-        message = json.loads(body)
-        source_id = message["source_id"]
-        url = message["url"]
-        rules = message.get("rules", {})
-        
-        print(f"Starting scraping for source {source_id}: {url}")
-        
-        # Get database session
-        db = get_db_session()
-        
-        try:
-            # Get scraping source
-            source = db.query(ScrapingSource).filter(ScrapingSource.id == source_id).first()
-            if not source:
-                print(f"Scraping source {source_id} not found")
-                return
-            
-            # Perform scraping
-            scraped_data = web_scraper.scrape_url(url, rules)
-            
-            if scraped_data:
-                # Save scraped content
-                content = ScrapedContent(
+        # Get scraping source
+        source = db.query(ScrapingSource).filter(ScrapingSource.id == source_id).first()
+        if not source:
+            logger.warning("Scraping source %s not found", source_id)
+            return
+
+        # Perform scraping
+        scraped_data = web_scraper.scrape_url(url, rules)
+
+        if scraped_data and scraped_data.get('duplicate'):
+            # The scraper saw this exact body earlier in the crawl; record
+            # the visit without touching scraped_content at all
+            source.last_scraped = datetime.utcnow()
+            db.commit()
+            logger.debug("Content from %s unchanged, skipping", url)
+            return
+
+        if scraped_data:
+            # Save scraped content; unchanged pages (same source and content
+            # hash) hit the unique index and are dropped, which also skips
+            # the expensive downstream classification
+            inserted = db.execute(
+                pg_insert(ScrapedContent).values(
                     source_id=source_id,
                     url=scraped_data['url'],
                     title=scraped_data.get('title', ''),
                     content=scraped_data.get('content', ''),
                     content_hash=scraped_data.get('content_hash', ''),
-                    metadata=scraped_data.get('metadata', {})
-                )
-                
-                db.add(content)
-                
-                # Update source last_scraped timestamp
-                source.last_scraped = content.scraped_at
-                
-                db.commit()
-                
-                print(f"Successfully scraped content from {url}")
-                
-                # If scraped content looks like a document, send for classification
-                if scraped_data.get('content') and len(scraped_data['content']) > 500:
-                    classification_message = {
-                        "scraped_content_id": content.id,
-                        "content": scraped_data['content'],
-                        "source_url": url,
-                        "title": scraped_data.get('title', '')
-                    }
-                    
-                    try:
-                        mq.publish_message("document_processing", classification_message)
-                    except Exception as e:
-                        print(f"Warning: Could not send scraped content for classification: {e}")
-            
-        except Exception as e:
-            print(f"Error processing scraping task for source {source_id}: {e}")
-        finally:
-            db.close()
-            
-    except Exception as e:
-        print(f"Error processing scraping message: {e}")
+                    meta=scraped_data.get('metadata', {})
+                ).on_conflict_do_nothing(
+                    index_elements=['source_id', 'content_hash']
+                ).returning(ScrapedContent.id, ScrapedContent.scraped_at)
+            ).first()
+
+            # Update source last_scraped timestamp
+            source.last_scraped = inserted.scraped_at if inserted else datetime.utcnow()
+
+            db.commit()
+
+            if not inserted:
+                logger.debug("Content from %s unchanged, skipping", url)
+                return
+
+            # Per-page success is DEBUG; one line per scrape swamps the log
+            # at crawl throughput
+            logger.debug("Successfully scraped content from %s", url)
+
+            # If scraped content looks like a document, send for classification
+            if scraped_data.get('content') and len(scraped_data['content']) > 500:
+                classification_message = {
+                    "scraped_content_id": inserted.id,
+                    "content": scraped_data['content'],
+                    "source_url": url,
+                    "title": scraped_data.get('title', '')
+                }
+
+                try:
+                    mq.publish_message("document_processing", classification_message)
+                except Exception as e:
+                    logger.warning("Could not send scraped content for classification: %s", e)
+
+    except Exception:
+        logger.exception("Error processing scraping task for source %s", source_id)
+    finally:
+        db.close()
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8005)
+    # uvloop + httptools are the C event loop / parser uvicorn[standard]
+    # ships; workers fork from the import string (each worker runs its own
+    # scraping consumer, competing on the queue)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8005,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "4")),
+        backlog=4096
+    )
@@ -1,5 +1,5 @@
 
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
@@ -18,9 +18,8 @@ class ScrapingSourceResponse(BaseModel):
     last_scraped: Optional[datetime]
     is_active: bool
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 class ScrapedContentResponse(BaseModel):
     id: int
@@ -28,11 +27,11 @@ class ScrapedContentResponse(BaseModel):
     url: str
     title: Optional[str]
     content_hash: Optional[str]
-    metadata: Optional[Dict[str, Any]]
+    # ORM attribute is "meta" ("metadata" is reserved); keep the wire name
+    meta: Optional[Dict[str, Any]] = Field(None, serialization_alias="metadata")
     scraped_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 class ScrapingTaskRequest(BaseModel):
     url: HttpUrl